@@ -0,0 +1,219 @@
+"""
+Admission Module - Flower Disease Advisor
+Concurrency limit, bounded wait queue, deadline shedding and per-user rate limits
+for the image inference routes
+
+Limits are per worker process: with gunicorn, total capacity is
+workers x ADMISSION_MAX_CONCURRENT.
+"""
+
+import functools
+import math
+import os
+import threading
+import time
+
+from flask import jsonify, make_response, request, session
+
+from metrics import REGISTRY, Counter, Gauge
+
+
+MAX_CONCURRENT = int(os.environ.get('ADMISSION_MAX_CONCURRENT', '0')) or max(1, (os.cpu_count() or 2) // 2)
+MAX_QUEUE = int(os.environ.get('ADMISSION_MAX_QUEUE', '16'))
+QUEUE_TIMEOUT = float(os.environ.get('ADMISSION_QUEUE_TIMEOUT', '5'))      # seconds a request may wait
+USER_RATE = float(os.environ.get('ADMISSION_USER_RATE', '1'))               # uploads per second per user; 0 = off
+USER_BURST = float(os.environ.get('ADMISSION_USER_BURST', '10'))
+# Opt-in for local benchmarks only: behind a reverse proxy on the same host every
+# client is 127.0.0.1, so exempting loopback would turn per-user limits off entirely
+EXEMPT_LOOPBACK = os.environ.get('ADMISSION_EXEMPT_LOOPBACK', '0') == '1'
+
+LOOPBACK_ADDRESSES = {'127.0.0.1', '::1'}
+
+# Idle token buckets are dropped once the table grows past this
+MAX_TRACKED_USERS = 10000
+
+ADMISSION_SHED = REGISTRY.register(Counter(
+    "flower_admission_shed_total",
+    "Inference requests rejected before running, by reason",
+    ("reason",),
+))
+
+
+class Rejected(Exception):
+    """Request refused before doing any work"""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+# ==================== RATE LIMITING ====================
+
+class TokenBucketLimiter:
+    """
+    Per-key token buckets: `rate` tokens per second up to `burst` (rate 0 disables limiting)
+
+    A request is allowed while the bucket holds at least one token and is
+    then charged its full cost, so a batch larger than the burst still gets
+    through but leaves the bucket in debt until it has been paid back.
+    """
+
+    def __init__(self, rate=USER_RATE, burst=USER_BURST):
+        self.rate = rate
+        self.burst = burst
+        self._buckets = {}   # key -> [tokens, last update]
+        self._lock = threading.Lock()
+
+    def take(self, key, cost=1):
+        """
+        Spend `cost` tokens
+
+        Returns:
+            float: 0 if allowed, otherwise seconds until a token is available
+        """
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= MAX_TRACKED_USERS:
+                    self._prune(now)
+                bucket = self._buckets[key] = [self.burst, now]
+
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= cost
+                return 0.0
+            return (1 - bucket[0]) / self.rate
+
+    def _prune(self, now):
+        """Forget buckets that have refilled completely; they behave like new ones"""
+        full_after = self.burst / self.rate
+        for key in [k for k, (tokens, last) in self._buckets.items()
+                    if now - last >= full_after + max(0.0, -tokens) / self.rate]:
+            del self._buckets[key]
+
+
+# ==================== ADMISSION ====================
+
+class AdmissionController:
+    """
+    Runs at most `max_concurrent` inference requests at a time
+
+    Up to `max_queue` more wait for a slot. A request is shed at once when
+    the queue is full or when the expected wait (queue position x average
+    service time) already exceeds `queue_timeout`, instead of timing out later.
+    """
+
+    def __init__(self, max_concurrent=MAX_CONCURRENT, max_queue=MAX_QUEUE, queue_timeout=QUEUE_TIMEOUT,
+                 limiter=None):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.limiter = limiter or TokenBucketLimiter()
+        self.in_flight = 0
+        self.waiting = 0
+        self._service_time = 0.5  # EWMA of seconds per admitted request
+        self._slots = threading.Condition()
+
+    def _expected_wait(self, position):
+        return position * self._service_time / self.max_concurrent
+
+    def acquire(self, user_key, cost=1):
+        """
+        Take a slot or raise Rejected
+
+        Args:
+            user_key (str): Rate-limit key, or None to skip the per-user limit
+            cost (int): Rate-limit tokens charged, e.g. images in a batch
+
+        Returns:
+            float: Admission time, passed back to release()
+        """
+        retry_after = self.limiter.take(user_key, cost) if user_key is not None else 0.0
+        if retry_after:
+            raise Rejected('rate_limited', retry_after)
+
+        with self._slots:
+            if self.in_flight < self.max_concurrent:
+                self.in_flight += 1
+                return time.monotonic()
+
+            if self.waiting >= self.max_queue:
+                raise Rejected('queue_full', self._expected_wait(self.waiting + 1))
+            if self._expected_wait(self.waiting + 1) > self.queue_timeout:
+                raise Rejected('deadline', self._expected_wait(self.waiting + 1))
+
+            deadline = time.monotonic() + self.queue_timeout
+            self.waiting += 1
+            try:
+                while self.in_flight >= self.max_concurrent:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise Rejected('timeout', self._expected_wait(self.waiting))
+                    self._slots.wait(remaining)
+            finally:
+                self.waiting -= 1
+            self.in_flight += 1
+            return time.monotonic()
+
+    def release(self, admitted_at):
+        with self._slots:
+            self.in_flight -= 1
+            self._service_time = 0.8 * self._service_time + 0.2 * (time.monotonic() - admitted_at)
+            self._slots.notify()
+
+    def guard(self, view=None, *, cost=None):
+        """
+        Decorate a Flask view with admission control
+
+        Use as @guard, or @guard(cost=fn) where fn() returns the request's
+        rate-limit cost (e.g. the number of images in a batch). The slot is
+        released when the view returns, except for streamed responses, which
+        keep it until their body has been sent and the response is closed.
+        """
+        if view is None:
+            return functools.partial(self.guard, cost=cost)
+
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                admitted_at = self.acquire(rate_limit_key(), max(1, cost()) if cost else 1)
+            except Rejected as e:
+                ADMISSION_SHED.inc(e.reason)
+                status = 429 if e.reason == 'rate_limited' else 503
+                response = make_response(jsonify({'error': 'Server busy, please retry', 'reason': e.reason}),
+                                         status)
+                response.headers['Retry-After'] = str(max(1, math.ceil(e.retry_after)))
+                return response
+
+            try:
+                response = make_response(view(*args, **kwargs))
+            except BaseException:
+                self.release(admitted_at)
+                raise
+            if response.is_streamed:
+                response.call_on_close(lambda: self.release(admitted_at))
+            else:
+                self.release(admitted_at)
+            return response
+
+        return wrapper
+
+
+def rate_limit_key():
+    """Logged-in user, else client address; None for exempt loopback clients"""
+    if EXEMPT_LOOPBACK and request.remote_addr in LOOPBACK_ADDRESSES:
+        return None
+    return session.get('user') or request.remote_addr
+
+
+def init_metrics(controller):
+    """Expose the controller's queue depth and in-flight count on /metrics"""
+    REGISTRY.register(Gauge("flower_admission_queue_depth", "Inference requests waiting for a slot",
+                            lambda: controller.waiting))
+    REGISTRY.register(Gauge("flower_admission_in_flight", "Inference requests running",
+                            lambda: controller.in_flight))
@@ -1,29 +1,126 @@
-from flask import Flask, render_template, request, jsonify, session, redirect
+from flask import Flask, render_template, request, jsonify, session, redirect, g, Response, stream_with_context
 import os
 import json
+import time
+import secrets
+import threading
 from datetime import datetime
+from functools import wraps
 from werkzeug.utils import secure_filename
-import uuid
-import cv2
+import numpy as np
 import hashlib
 from difflib import get_close_matches
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from lazy_imports import lazy_import
+from model_backend import load_backend, preprocess_image, apply_temperature, predict_tta, top_classes
+import model_registry
+from model_router import ShadowRouter
+import capture
+import thumbnails
+from storage import LocalObjectStore, UploadStore, key_digest
+from jobs import JobQueue, QueueFull, FINISHED_STATES
+from fusion import FusionRanker
+from multilingual import normalize_query, preload_tables
+from catalog_cache import CatalogCache
+from autocomplete import build_index
+import nlp_db
+import admission
+from image_quality import assess_quality
+from phash import DuplicateIndex, phash
+import metrics
+import profiling
+from metrics import stage
+
+# OpenCV is only needed by image routes; import it on first use (or in prewarm())
+cv2 = lazy_import('cv2')
 
 
 # ==================== INITIALIZE FLASK ====================
+SECRET_KEY_FILE = os.environ.get('SECRET_KEY_FILE', '.secret_key')
+
+
+def load_secret_key(path=SECRET_KEY_FILE):
+    """
+    Session signing key shared by every worker process and kept across restarts
+    
+    Uses SECRET_KEY from the environment, otherwise a random key written to
+    `path` by whichever process starts first.
+    """
+    key = os.environ.get('SECRET_KEY')
+    if key:
+        return key
+    
+    if not os.path.exists(path):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(secrets.token_hex(32))
+        os.chmod(tmp_path, 0o600)
+        try:
+            os.link(tmp_path, path)  # atomic; loses quietly to a concurrent first start
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(tmp_path)
+    
+    with open(path) as f:
+        return f.read().strip()
+
+
 app = Flask(__name__)
-app.secret_key = os.urandom(24)
+app.secret_key = load_secret_key()
+metrics.init_app(app)
+profiling.init_app(app)
+capture.init_app(app)
 
 
 # ==================== CONFIGURATION ====================
 UPLOAD_FOLDER = "static/uploads"
 ALLOWED_EXTENSIONS = {'jpg', 'jpeg', 'png', 'gif', 'bmp', 'webp'}
 MAX_FILE_SIZE = 16 * 1024 * 1024  # 16MB
+MAX_BATCH_FILES = 50
+# Whole multipart body of a batch upload; MAX_CONTENT_LENGTH alone would cap the batch at 16MB
+MAX_BATCH_REQUEST_SIZE = MAX_BATCH_FILES * MAX_FILE_SIZE + 1024 * 1024  # + form fields and boundaries
+BATCH_INFERENCE_SIZE = 16  # images per model call in batch uploads
+UPLOAD_INDEX = os.environ.get('UPLOAD_INDEX', 'uploads.sqlite3')
+MODEL_PATH = os.environ.get('MODEL_PATH', '')  # .h5 or exported .tflite; empty = demo mode
+MODEL_NAME = os.environ.get('MODEL_NAME', '')  # registry model served via MODEL_VERSION when MODEL_PATH is unset
+MODEL_VERSION = os.environ.get('MODEL_VERSION', 'production')  # version, alias or 'latest'
+SHADOW_MODEL = os.environ.get('SHADOW_MODEL', '')  # registry version/alias shadow-run beside the served one
+SHADOW_SAMPLE_RATE = float(os.environ.get('SHADOW_SAMPLE_RATE', '0.1'))
+INFERENCE_MODE = os.environ.get('INFERENCE_MODE', 'single')  # 'single' or 'tta' (augmented, averaged)
+TOP_K = 3
+LOW_CONFIDENCE = float(os.environ.get('LOW_CONFIDENCE', '0.5'))  # below this, prefer the text match
 
 
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = MAX_FILE_SIZE
 
+if MODEL_NAME and not MODEL_PATH:
+    served_model = model_registry.resolve(MODEL_NAME, MODEL_VERSION)
+    MODEL_PATH, SERVED_VERSION = served_model['path'], served_model['version']
+else:
+    SERVED_VERSION = os.path.basename(MODEL_PATH)
+
+# Loaded on first use or by prewarm(); None in demo mode
+_inference_backend = None
+_inference_backend_lock = threading.Lock()
+
+# Content-addressed, deduplicated uploads under static/uploads/ab/cd/<sha256>.<ext>
+upload_store = UploadStore(LocalObjectStore(UPLOAD_FOLDER, '/static/uploads/'), UPLOAD_INDEX)
+
+# Perceptual hashes of analyzed photos; near-duplicates reuse the earlier prediction
+duplicate_index = DuplicateIndex()
+
+thumbnail_pipeline = thumbnails.ThumbnailPipeline(upload_store)
+thumbnails.init_app(app, thumbnail_pipeline)
+upload_store.on_delete(lambda key: thumbnail_pipeline.delete(key_digest(key)))
+upload_store.start_gc()
+
+# Bounds concurrent decode + inference per worker; sheds load with 503/429 + Retry-After
+inference_admission = admission.AdmissionController()
+admission.init_metrics(inference_admission)
+
 
 # ==================== FLOWER DISEASE DATABASE ====================
 SYMPTOM_DB = {
@@ -149,6 +246,13 @@ SYMPTOM_KEYWORDS = {
     "stunted": ["Gerbera Powdery Mildew"]
 }
 
+fusion_ranker = FusionRanker(SYMPTOM_DB, SYMPTOM_KEYWORDS)
+
+autocomplete_index = build_index(
+    SYMPTOM_DB, SYMPTOM_KEYWORDS,
+    {name: info['common_keywords'] for name, info in nlp_db.SYMPTOM_DB.items()}
+)
+
 
 # ==================== HELPER FUNCTIONS ====================
 
@@ -158,9 +262,34 @@ def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+def save_upload(file, keep=False):
+    """
+    Store an uploaded file, deduplicated by content
+    
+    Args:
+        file: Uploaded file
+        keep (bool): Hold a storage reference, for image URLs returned without
+            a chat history entry (otherwise GC removes them after the grace period)
+    
+    Returns:
+        tuple: (storage key, local path, sha256 digest)
+    """
+    with stage('save'):
+        key, digest, _ = upload_store.put_upload(file.stream, secure_filename(file.filename), keep=keep)
+    return key, upload_store.local_path(key), digest
+
+
+def release_history_images(history):
+    """Drop the storage references held by a chat history"""
+    for item in history or []:
+        key = upload_store.key_from_url(item.get('image_url'))
+        if key:
+            upload_store.release(key)
+
+
 def find_disease_by_symptoms(symptom_text):
-    """Find disease matching symptom keywords"""
-    symptom_text = symptom_text.lower().strip()
+    """Find disease matching symptom keywords (any supported language)"""
+    _, symptom_text = normalize_query(symptom_text.strip())
     matched_diseases = set()
     
     for keyword, diseases in SYMPTOM_KEYWORDS.items():
@@ -179,20 +308,227 @@ def find_disease_by_symptoms(symptom_text):
     return list(SYMPTOM_DB.values())[:3]
 
 
-def predict_image_disease(image_path):
-    """Analyze image and predict disease"""
-    try:
-        img = cv2.imread(image_path)
-        if img is None:
-            return None, "Invalid image format"
+def get_inference_backend():
+    """The model backend, loaded on first call (None when MODEL_PATH is unset)"""
+    global _inference_backend
+    if _inference_backend is None and MODEL_PATH:
+        with _inference_backend_lock:
+            if _inference_backend is None:
+                backend = load_backend(MODEL_PATH)
+                if MODEL_NAME and SHADOW_MODEL:
+                    candidate = model_registry.resolve(MODEL_NAME, SHADOW_MODEL)
+                    backend = ShadowRouter(backend, SERVED_VERSION, candidate['path'], candidate['version'],
+                                           SHADOW_SAMPLE_RATE)
+                _inference_backend = backend
+    return _inference_backend
+
+
+def prewarm(before_fork=False):
+    """
+    Do the slow start-up work now instead of on the first request
+    
+    A preforking server calls prewarm(before_fork=True) in the master so the
+    imported modules, lookup tables and (TFLite) model weights are shared
+    copy-on-write by every worker, then prewarm() in each worker to run one
+    warm-up inference. TensorFlow is not fork-safe once initialized, so Keras
+    models are only loaded after the fork.
+    
+    Returns:
+        dict: Seconds spent per step
+    """
+    timings = {}
+    
+    start = time.perf_counter()
+    cv2.load()
+    timings['import_cv2'] = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    preload_tables()
+    catalog.payload('stats')
+    timings['tables'] = time.perf_counter() - start
+    
+    if MODEL_PATH and (not before_fork or MODEL_PATH.endswith('.tflite')):
+        start = time.perf_counter()
+        backend = get_inference_backend()
+        timings['load_model'] = time.perf_counter() - start
+        
+        if not before_fork:
+            start = time.perf_counter()
+            views = 8 if INFERENCE_MODE == 'tta' else 1
+            backend.predict(np.zeros((views, *backend.input_size, 3), dtype=np.float32))
+            timings['warmup_inference'] = time.perf_counter() - start
+    return timings
+
+
+def decode_image(image_path, route=None):
+    """Read an image from disk (None if it is not a valid image); route labels the stage off-request"""
+    with stage('decode', route):
+        return cv2.imread(image_path)
+
+
+def classify_images(images, image_paths):
+    """
+    Quality-check decoded images, then predict diseases for the usable ones in one batch
+    
+    Returns:
+        list: (disease_name, disease_info, prediction, quality) per image; (None, error, None, quality)
+              on failure. prediction is {'confidence', 'top_k', 'probs'} with calibrated values,
+              None in demo mode; quality is the assess_quality() report
+    """
+    with stage('quality'):
+        qualities = [assess_quality(img) for img in images]
+    usable = [i for i, q in enumerate(qualities) if q['ok']]
+    
+    results = [(None, q['message'], None, q) for q in qualities]
+    if usable:
+        predictions = predict_with_reuse([images[i] for i in usable], [image_paths[i] for i in usable])
+        for i, prediction in zip(usable, predictions):
+            results[i] = (*prediction, qualities[i])
+    return results
+
+
+def predict_with_reuse(images, image_paths):
+    """
+    Predict diseases, reusing earlier results for near-duplicate photos
+    
+    Photos of the same plant taken seconds apart differ in bytes but not in
+    perceptual hash, so their prediction is looked up instead of recomputed.
+    Reused predictions carry 'near_duplicate': {'distance'} (differing hash bits).
+    Demo mode has no inference to save and always predicts.
+    
+    Returns:
+        list: (disease_name, disease_info, prediction) per image, as in predict_images
+    """
+    if get_inference_backend() is None:
+        return predict_images(images, image_paths)
+    
+    model_key = f"{MODEL_PATH}:{INFERENCE_MODE}"
+    with stage('phash'):
+        hashes = [phash(img) for img in images]
+        matches = [duplicate_index.find(h, model_key) for h in hashes]
+    
+    results = [None] * len(images)
+    for i, match in enumerate(matches):
+        if match is not None:
+            earlier, distance = match
+            name = earlier['disease']
+            if name in SYMPTOM_DB:
+                results[i] = (name, SYMPTOM_DB[name], {**earlier['prediction'], 'near_duplicate': {'distance': distance}})
+    
+    missing = [i for i, r in enumerate(results) if r is None]
+    if missing:
+        predictions = predict_images([images[i] for i in missing], [image_paths[i] for i in missing])
+        for i, result in zip(missing, predictions):
+            results[i] = result
+            if result[0] is not None:
+                duplicate_index.add(hashes[i], model_key, {'disease': result[0], 'prediction': result[2]})
+    return results
+
+
+def predict_images(images, image_paths):
+    """
+    Predict diseases for already decoded images in one batch
+    
+    Returns:
+        list: (disease_name, disease_info, prediction) per image, as in classify_images
+    """
+    inference_backend = get_inference_backend()
+    if inference_backend is not None:
+        if INFERENCE_MODE == 'tta':
+            with stage('inference'):
+                probs, ranked = predict_tta(inference_backend, images, TOP_K)
+        else:
+            with stage('preprocess'):
+                batch = np.stack([preprocess_image(img, inference_backend.input_size) for img in images])
+            with stage('inference'):
+                probs = apply_temperature(inference_backend.predict(batch), inference_backend.temperature)
+            ranked = [top_classes(p, inference_backend.class_names, TOP_K) for p in probs]
         
-        # Use hash to select disease (for demo)
+        class_names = inference_backend.class_names
+        results = []
+        for p, top_k in zip(probs, ranked):
+            class_name = top_k[0]['name']
+            if class_name not in SYMPTOM_DB:
+                results.append((None, f"Model predicted unknown class: {class_name}", None))
+            else:
+                prediction = {
+                    'confidence': top_k[0]['confidence'],
+                    'top_k': top_k,
+                    'probs': {class_names[i]: float(p[i]) for i in range(min(len(p), len(class_names)))},
+                }
+                results.append((class_name, SYMPTOM_DB[class_name], prediction))
+        return results
+    
+    # Use hash to select disease (for demo)
+    diseases = list(SYMPTOM_DB.keys())
+    results = []
+    for image_path in image_paths:
         h = hashlib.md5(image_path.encode()).hexdigest()
-        diseases = list(SYMPTOM_DB.keys())
         selected_disease = diseases[int(h, 16) % len(diseases)]
-        return selected_disease, SYMPTOM_DB[selected_disease]
+        results.append((selected_disease, SYMPTOM_DB[selected_disease], None))
+    return results
+
+
+def predict_image(image_path):
+    """
+    Analyze one image
+    
+    Returns:
+        tuple: (disease_name, disease_info, prediction, quality) as in classify_images
+    """
+    try:
+        img = decode_image(image_path)
+        if img is None:
+            return None, "Invalid image format", None, None
+        
+        return classify_images([img], [image_path])[0]
     except Exception as e:
-        return None, f"Error: {str(e)}"
+        return None, f"Error: {str(e)}", None, None
+
+
+def predict_image_disease(image_path):
+    """Analyze image and predict disease"""
+    disease_name, disease_info, _, _ = predict_image(image_path)
+    return disease_name, disease_info
+
+
+def is_low_confidence(prediction):
+    """True when a calibrated model prediction is too uncertain to trust over the text match"""
+    return prediction is not None and prediction['confidence'] < LOW_CONFIDENCE
+
+
+def analyze_upload(filepath, filename, description='', thumbnail_url=None):
+    """
+    Full analysis of a saved upload, shared by the sync and async upload paths
+
+    Returns:
+        dict: Upload tab response body, or {'error': ...} on failure
+    """
+    disease_name, disease_info, prediction, quality = predict_image(filepath)
+    
+    if disease_name is None:
+        return {'error': disease_info, 'quality': quality}
+    
+    # One ranking from the image and the user description together
+    ranking = fusion_ranker.rank(disease_name, prediction, description)
+    
+    return {
+        'success': True,
+        'disease': ranking[0]['name'],
+        'disease_info': SYMPTOM_DB[ranking[0]['name']],
+        'ranking': ranking,
+        'confidence': prediction['confidence'] if prediction else None,
+        'top_k': prediction['top_k'] if prediction else [],
+        'low_confidence': is_low_confidence(prediction),
+        'quality': quality,
+        'image_url': upload_store.url(filename),
+        'thumbnail_url': thumbnail_url,
+        'alternate_matches': [SYMPTOM_DB[r['name']] for r in ranking[1:3]]
+    }
+
+
+# Process pool for ?async=1 uploads; created on first use
+analysis_jobs = JobQueue(analyze_upload)
 
 
 def get_chat_history():
@@ -200,7 +536,7 @@ def get_chat_history():
     return session.get('chat_history', [])
 
 
-def add_to_history(role, content, image_url=None):
+def add_to_history(role, content, image_url=None, thumb_url=None):
     """Add message to chat history"""
     if 'chat_history' not in session:
         session['chat_history'] = []
@@ -214,6 +550,11 @@ def add_to_history(role, content, image_url=None):
     
     if image_url:
         history_item['image_url'] = image_url
+        key = upload_store.key_from_url(image_url)
+        if key:
+            upload_store.add_ref(key)
+    if thumb_url:
+        history_item['thumb_url'] = thumb_url
     
     session['chat_history'].append(history_item)
     session.modified = True
@@ -221,21 +562,42 @@ def add_to_history(role, content, image_url=None):
 
 def clear_chat_history():
     """Clear chat history"""
+    release_history_images(session.get('chat_history'))
     session['chat_history'] = []
     session.modified = True
 
 
-def get_database_stats():
-    """Get database statistics"""
+def compute_database_stats():
+    """Compute database statistics"""
     return {
         'total_diseases': len(SYMPTOM_DB),
         'total_keywords': len(SYMPTOM_KEYWORDS),
         'high_severity': len([d for d in SYMPTOM_DB.values() if d['severity'] == 'High']),
         'medium_severity': len([d for d in SYMPTOM_DB.values() if d['severity'] == 'Medium']),
-        'categories': list(set([d['category'] for d in SYMPTOM_DB.values()]))
+        'categories': sorted(set([d['category'] for d in SYMPTOM_DB.values()]))
     }
 
 
+def build_catalog():
+    """Bodies of the read-only catalog endpoints, keyed for catalog.respond()"""
+    bodies = {
+        'diseases': list(SYMPTOM_DB.values()),
+        'stats': {'success': True, 'stats': compute_database_stats()},
+    }
+    for name, info in SYMPTOM_DB.items():
+        bodies[f'disease/{name}'] = info
+    return bodies
+
+
+# Serialized and compressed once; call catalog.invalidate() after editing SYMPTOM_DB/SYMPTOM_KEYWORDS
+catalog = CatalogCache(build_catalog)
+
+
+def get_database_stats():
+    """Get database statistics (memoized with the catalog)"""
+    return catalog.payload('stats')['stats']
+
+
 # ==================== ROUTES ====================
 
 
@@ -254,7 +616,7 @@ def login():
         username = request.form.get('username', '').strip()
         if username:
             session['user'] = username
-            session['chat_history'] = []
+            clear_chat_history()
             return redirect('/dashboard')
         return render_template('login.html', error='Please enter a username')
     return render_template('login.html')
@@ -263,6 +625,7 @@ def login():
 @app.route('/logout')
 def logout():
     """User logout"""
+    release_history_images(session.get('chat_history'))
     session.clear()
     return redirect('/login')
 
@@ -322,10 +685,13 @@ def chat_message():
 
 
 @app.route('/api/upload-image-chat', methods=['POST'])
+@inference_admission.guard
 def upload_image_chat():
     """Upload image in chat and analyze"""
     try:
-        if 'file' not in request.files:
+        with stage('receive'):
+            received = 'file' in request.files
+        if not received:
             return jsonify({'error': 'No file provided'}), 400
         
         file = request.files['file']
@@ -338,30 +704,33 @@ def upload_image_chat():
             return jsonify({'error': 'Invalid file type'}), 400
         
         # Save file
-        filename = f"{uuid.uuid4()}_{secure_filename(file.filename)}"
-        filepath = os.path.join(UPLOAD_FOLDER, filename)
-        file.save(filepath)
+        filename, filepath, digest = save_upload(file)
+        g.upload_path = filepath
+        digest = thumbnail_pipeline.schedule(filepath, digest)
         
-        # Predict disease from image
-        disease_name, disease_info = predict_image_disease(filepath)
+        # Predict disease from image, ranked together with the description
+        disease_name, disease_info, prediction, quality = predict_image(filepath)
         
         if disease_name is None:
-            return jsonify({'error': disease_info}), 500
+            return jsonify({'error': disease_info, 'quality': quality}), 422 if quality and not quality['ok'] else 500
+        
+        ranking = fusion_ranker.rank(disease_name, prediction, user_input)
+        disease_name = ranking[0]['name']
+        disease_info = SYMPTOM_DB[disease_name]
         
         # Prepare response
-        image_url = f'/static/uploads/{filename}'
+        image_url = upload_store.url(filename)
+        thumb_url = thumbnail_pipeline.url(digest, filename, 'sm')
         user_msg = f"📸 Image uploaded"
         if user_input:
             user_msg += f": {user_input}"
         
-        # Add user message with image
-        add_to_history('user', user_msg, image_url)
-        
         # Generate structured response with baby pink background
-        affected_parts_html = ', '.join(disease_info['affected_parts'])
-        severity_color = '#FF6B6B' if disease_info['severity'] == 'High' else '#FFA500'
+        with stage('render'):
+            affected_parts_html = ', '.join(disease_info['affected_parts'])
+            severity_color = '#FF6B6B' if disease_info['severity'] == 'High' else '#FFA500'
 
-        bot_response = f"""<div style="background:#FFE4E1;border-radius:10px;padding:20px;border-left:5px solid #FF69B4;">
+            bot_response = f"""<div style="background:#FFE4E1;border-radius:10px;padding:20px;border-left:5px solid #FF69B4;">
   <h2 style="color:#C71585;margin-bottom:15px;">🔍 Disease Analysis Results</h2>
 
   <div style="background:#FFFFFF;border-radius:8px;padding:15px;margin-bottom:15px;">
@@ -403,20 +772,25 @@ def upload_image_chat():
   </div>
 </div>"""
         
-        # If user provided description, also analyze it
-        if user_input:
-            matched = find_disease_by_symptoms(user_input)
-            if matched and matched[0]['name'] != disease_name:
-                bot_response += f"\n\n⚠️ **Note:** Based on your description, this could also be **{matched[0]['name']}**. Please verify by checking the symptoms carefully."
+        if quality['issues']:
+            bot_response += f"\n\n📷 **Photo quality:** {quality['message']}. Results may be less reliable; a sharper, well-lit photo helps."
+        
+        if user_input and len(ranking) > 1:
+            bot_response += f"\n\n⚠️ **Note:** The next most likely match is **{ranking[1]['name']}**. Please verify by checking the symptoms carefully."
         
-        # Add bot response
+        # Add the user message with its image and the bot response (the cookie is
+        # written after the view returns, timed as the session_write stage)
+        add_to_history('user', user_msg, image_url, thumb_url)
         add_to_history('bot', bot_response)
         
         return jsonify({
             'success': True,
             'disease': disease_name,
             'disease_info': disease_info,
+            'ranking': ranking,
+            'quality': quality,
             'image_url': image_url,
+            'thumbnail_url': thumbnail_pipeline.url(digest, filename),
             'response': bot_response,
             'history': get_chat_history()
         })
@@ -425,10 +799,13 @@ def upload_image_chat():
 
 
 @app.route('/api/upload-image-tab', methods=['POST'])
+@inference_admission.guard
 def upload_image_tab():
     """Upload image from upload tab and analyze"""
     try:
-        if 'file' not in request.files:
+        with stage('receive'):
+            received = 'file' in request.files
+        if not received:
             return jsonify({'error': 'No file provided'}), 400
         
         file = request.files['file']
@@ -441,32 +818,200 @@ def upload_image_tab():
             return jsonify({'error': 'Invalid file type'}), 400
         
         # Save file
-        filename = f"{uuid.uuid4()}_{secure_filename(file.filename)}"
-        filepath = os.path.join(UPLOAD_FOLDER, filename)
-        file.save(filepath)
+        filename, filepath, digest = save_upload(file, keep=True)
+        g.upload_path = filepath
+        thumbnail_url = thumbnail_pipeline.url(thumbnail_pipeline.schedule(filepath, digest), filename)
         
-        # Predict disease
-        disease_name, disease_info = predict_image_disease(filepath)
+        # Asynchronous mode: hand off to the worker pool and return immediately
+        if request.args.get('async') == '1' or request.form.get('async') == '1':
+            # The admission slot is released with the 202, so the job queue has its own bound
+            try:
+                job_id = analysis_jobs.submit(filepath, filename, user_description, thumbnail_url)
+            except QueueFull:
+                admission.ADMISSION_SHED.inc('jobs_full')
+                response = jsonify({'error': 'Server busy, please retry', 'reason': 'jobs_full'})
+                response.headers['Retry-After'] = '5'
+                return response, 503
+            return jsonify({
+                'success': True,
+                'job_id': job_id,
+                'status': 'queued',
+                'thumbnail_url': thumbnail_url,
+                'result_url': f'/api/jobs/{job_id}',
+                'events_url': f'/api/jobs/{job_id}/events'
+            }), 202
         
-        if disease_name is None:
-            return jsonify({'error': disease_info}), 500
+        # Predict disease
+        result = analyze_upload(filepath, filename, user_description, thumbnail_url)
         
-        # Also check user description if provided
-        alternate_matches = []
-        if user_description:
-            alternate_matches = find_disease_by_symptoms(user_description)
+        if 'error' in result:
+            return jsonify(result), 422 if result.get('quality') and not result['quality']['ok'] else 500
         
-        return jsonify({
-            'success': True,
-            'disease': disease_name,
-            'disease_info': disease_info,
-            'image_url': f'/static/uploads/{filename}',
-            'alternate_matches': [d for d in alternate_matches if d['name'] != disease_name][:2]
-        })
+        with stage('render'):
+            return jsonify(result)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+def max_request_size(limit):
+    """Raise MAX_CONTENT_LENGTH for one route; must wrap anything that reads the form"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            request.max_content_length = limit
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def upload_size(file):
+    """Size in bytes of an already received upload"""
+    file.stream.seek(0, os.SEEK_END)
+    size = file.stream.tell()
+    file.stream.seek(0)
+    return size
+
+
+def batch_file_count():
+    """Rate-limit cost of a batch upload: one token per image"""
+    return len(request.files.getlist('files') or request.files.getlist('file'))
+
+
+@app.route('/api/upload-images-batch', methods=['POST'])
+@max_request_size(MAX_BATCH_REQUEST_SIZE)
+@inference_admission.guard(cost=batch_file_count)
+def upload_images_batch():
+    """
+    Analyze many images from one multipart request
+    
+    Responds with NDJSON: one line per image as soon as its result is ready,
+    then a summary line. Invalid files produce an error line for that file
+    only; the rest of the batch continues.
+    """
+    files = request.files.getlist('files') or request.files.getlist('file')
+    description = request.form.get('description', '').strip()
+    
+    if not files:
+        return jsonify({'error': 'No files provided'}), 400
+    if len(files) > MAX_BATCH_FILES:
+        return jsonify({'error': f'Too many files. Maximum {MAX_BATCH_FILES} per batch.'}), 400
+    
+    # Validate and save everything up front, while the request body is available
+    saved, early_errors = [], []
+    for index, file in enumerate(files):
+        if file.filename == '':
+            early_errors.append({'index': index, 'filename': '', 'error': 'No file selected'})
+        elif not allowed_file(file.filename):
+            early_errors.append({'index': index, 'filename': file.filename, 'error': 'Invalid file type'})
+        elif upload_size(file) > MAX_FILE_SIZE:
+            early_errors.append({'index': index, 'filename': file.filename,
+                                 'error': f'File too large. Maximum {MAX_FILE_SIZE // (1024 * 1024)}MB allowed.'})
+        else:
+            filename, filepath, digest = save_upload(file, keep=True)
+            thumbnail_url = thumbnail_pipeline.url(thumbnail_pipeline.schedule(filepath, digest), filename)
+            saved.append((index, file.filename, filename, filepath, thumbnail_url))
+    
+    # The description is the same for every image, so score it once
+    text_scores = fusion_ranker.text_scores(description)
+    
+    def result_line(index, original, filename, thumbnail_url, disease_name, disease_info, prediction, quality):
+        if disease_name is None:
+            return {'index': index, 'filename': original, 'error': disease_info, 'quality': quality}
+        ranking = fusion_ranker.rank(disease_name, prediction, text=text_scores)
+        return {
+            'index': index,
+            'filename': original,
+            'success': True,
+            'disease': ranking[0]['name'],
+            'disease_info': SYMPTOM_DB[ranking[0]['name']],
+            'ranking': ranking,
+            'confidence': prediction['confidence'] if prediction else None,
+            'top_k': prediction['top_k'] if prediction else [],
+            'low_confidence': is_low_confidence(prediction),
+            'quality': quality,
+            'image_url': upload_store.url(filename),
+            'thumbnail_url': thumbnail_url,
+            'alternate_matches': [SYMPTOM_DB[r['name']] for r in ranking[1:3]]
+        }
+    
+    def generate():
+        errors = len(early_errors)
+        for line in early_errors:
+            yield json.dumps(line) + '\n'
+        
+        pending = []
+        
+        def flush():
+            images = [item[5] for item in pending]
+            paths = [item[3] for item in pending]
+            try:
+                predictions = classify_images(images, paths)
+            except Exception as e:
+                predictions = [(None, f"Error: {str(e)}", None, None)] * len(pending)
+            lines = [result_line(i, orig, fn, thumb, *prediction)
+                     for (i, orig, fn, _, thumb, _), prediction in zip(pending, predictions)]
+            pending.clear()
+            return lines
+        
+        # OpenCV releases the GIL while decoding, so threads decode in parallel;
+        # they have no request context, so the endpoint is passed for the stage label
+        with ThreadPoolExecutor(max_workers=min(8, len(saved) or 1)) as pool:
+            futures = {pool.submit(decode_image, item[3], request.endpoint): item for item in saved}
+            for future in as_completed(futures):
+                index, original, filename, filepath, thumbnail_url = futures[future]
+                img = future.result()
+                if img is None:
+                    errors += 1
+                    yield json.dumps({'index': index, 'filename': original, 'error': 'Invalid image format'}) + '\n'
+                    continue
+                
+                pending.append((index, original, filename, filepath, thumbnail_url, img))
+                if len(pending) >= BATCH_INFERENCE_SIZE:
+                    for line in flush():
+                        errors += 'error' in line
+                        yield json.dumps(line) + '\n'
+        
+        if pending:
+            for line in flush():
+                errors += 'error' in line
+                yield json.dumps(line) + '\n'
+        
+        yield json.dumps({'done': True, 'count': len(files), 'errors': errors}) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Poll an asynchronous analysis job"""
+    job = analysis_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
+
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """Stream job status as server-sent events until it finishes"""
+    if analysis_jobs.get(job_id) is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    def generate():
+        deadline = time.monotonic() + 300
+        while True:
+            job = analysis_jobs.wait(job_id, timeout=15)
+            if job is None:
+                # Purged (or never stored) while the stream was open
+                yield f"event: error\ndata: {json.dumps({'error': 'Job not found'})}\n\n"
+                return
+            yield f"event: {job['status']}\ndata: {json.dumps(job)}\n\n"
+            if job['status'] in FINISHED_STATES or time.monotonic() > deadline:
+                return
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
 @app.route('/api/search-symptoms', methods=['POST'])
 def search_symptoms():
     """Search diseases by symptoms"""
@@ -492,14 +1037,14 @@ def search_symptoms():
 @app.route('/api/diseases', methods=['GET'])
 def get_diseases():
     """Get all diseases"""
-    return jsonify(list(SYMPTOM_DB.values()))
+    return catalog.respond('diseases')
 
 
 @app.route('/api/disease/<disease_name>', methods=['GET'])
 def get_disease(disease_name):
     """Get specific disease"""
-    if disease_name in SYMPTOM_DB:
-        return jsonify(SYMPTOM_DB[disease_name])
+    if f'disease/{disease_name}' in catalog:
+        return catalog.respond(f'disease/{disease_name}')
     return jsonify({'error': 'Disease not found'}), 404
 
 
@@ -527,10 +1072,7 @@ def clear_history():
 def get_stats():
     """Get database statistics"""
     try:
-        return jsonify({
-            'success': True,
-            'stats': get_database_stats()
-        })
+        return catalog.respond('stats')
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
@@ -565,6 +1107,19 @@ def search_keyword():
         return jsonify({'error': str(e)}), 400
 
 
+@app.route('/api/autocomplete', methods=['GET'])
+def autocomplete():
+    """Completions for search-as-you-type (?q=<prefix>&limit=<n>)"""
+    prefix = request.args.get('q', '')
+    limit = request.args.get('limit', 8, type=int)   # clamped to [1, MAX_RESULTS] by complete()
+    response = jsonify({
+        'query': prefix,
+        'completions': autocomplete_index.complete(prefix, limit)
+    })
+    response.headers['Cache-Control'] = 'public, max-age=60'
+    return response
+
+
 # ==================== ERROR HANDLERS ====================
 
 
@@ -583,7 +1138,10 @@ def internal_error(error):
 @app.errorhandler(413)
 def request_too_large(error):
     """Handle file too large errors"""
-    return jsonify({'error': 'File too large. Maximum 16MB allowed.'}), 413
+    if request.max_content_length == MAX_BATCH_REQUEST_SIZE:
+        return jsonify({'error': f'Batch too large. Maximum {MAX_BATCH_FILES} files of '
+                                 f'{MAX_FILE_SIZE // (1024 * 1024)}MB each.'}), 413
+    return jsonify({'error': f'File too large. Maximum {MAX_FILE_SIZE // (1024 * 1024)}MB allowed.'}), 413
 
 
 # ==================== MAIN ====================
@@ -597,10 +1155,15 @@ if __name__ == '__main__':
     print("✅ Keywords loaded: 25+ symptom keywords")
     print("✅ Upload folder: " + UPLOAD_FOLDER)
     print("✅ Max file size: 16MB")
+    print("✅ Model: " + (MODEL_PATH or "demo mode (no MODEL_PATH set)"))
+    if MODEL_NAME and SHADOW_MODEL:
+        print(f"✅ Shadow model: {MODEL_NAME} {SHADOW_MODEL} on {SHADOW_SAMPLE_RATE:.0%} of inferences")
+    print(f"✅ Inference mode: {INFERENCE_MODE}")
     print("=" * 60)
     print("🌐 Open browser: http://localhost:5000")
     print("📸 Features: Chat, Image Upload, Search, Browse, History")
     print("🎤 Voice: Microphone Input & Text-to-Speech Output")
+    print("🏭 Production: gunicorn -c gunicorn.conf.py wsgi:app")
     print("=" * 60)
     
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,126 @@
+"""
+Autocomplete Module - Flower Disease Advisor
+Search-as-you-type completions over disease names and symptom keywords
+"""
+
+import time
+from bisect import bisect_left
+
+
+# Lower sorts first when two completions match equally well
+KIND_PRIORITY = {'disease': 0, 'keyword': 1}
+
+# Index entries examined per query; bounds the work for one-letter prefixes
+MAX_SCAN = 200
+
+# Upper bound on completions returned for one query
+MAX_RESULTS = 20
+
+
+class Autocomplete:
+    """
+    Prefix index over a sorted array of keys, searched with bisect
+
+    Every word start of a phrase is indexed, so "spot" completes both "spots"
+    and "rose black spot". Matches on the first word rank above matches on a
+    later word.
+    """
+
+    def __init__(self):
+        self._entries = {}   # display text -> {'text', 'type', 'diseases'}
+        self._keys = []
+        self._targets = []   # parallel to _keys: (display text, word position)
+
+    def add(self, text, kind, diseases):
+        """Register a phrase and the diseases it points at (call build() afterwards)"""
+        text = ' '.join(text.lower().split())
+        entry = self._entries.get(text)
+        if entry is None:
+            self._entries[text] = entry = {'text': text, 'type': kind, 'diseases': []}
+        elif KIND_PRIORITY[kind] < KIND_PRIORITY[entry['type']]:
+            entry['type'] = kind
+        for disease in diseases:
+            if disease not in entry['diseases']:
+                entry['diseases'].append(disease)
+
+    def build(self):
+        """Sort the word-start keys; must run before complete()"""
+        pairs = []
+        for text in self._entries:
+            words = text.split(' ')
+            for position in range(len(words)):
+                pairs.append((' '.join(words[position:]), text, position))
+        pairs.sort()
+        self._keys = [key for key, _, _ in pairs]
+        self._targets = [(text, position) for _, text, position in pairs]
+        return self
+
+    def complete(self, prefix, limit=8):
+        """
+        Ranked completions for a typed prefix
+
+        Args:
+            prefix (str): Typed text
+            limit (int): Completions wanted, clamped to [1, MAX_RESULTS]
+
+        Returns:
+            list: [{'text', 'type', 'diseases'}, ...], best first
+        """
+        prefix = ' '.join(prefix.lower().split())
+        if not prefix:
+            return []
+
+        best = {}
+        start = bisect_left(self._keys, prefix)
+        for i in range(start, min(start + MAX_SCAN, len(self._keys))):
+            if not self._keys[i].startswith(prefix):
+                break
+            text, position = self._targets[i]
+            entry = self._entries[text]
+            rank = (text != prefix, position > 0, KIND_PRIORITY[entry['type']], len(text), text)
+            if text not in best or rank < best[text]:
+                best[text] = rank
+
+        limit = max(1, min(limit, MAX_RESULTS))
+        ranked = sorted(best, key=best.get)[:limit]
+        return [self._entries[text] for text in ranked]
+
+
+def build_index(disease_db, symptom_keywords, common_keywords=None):
+    """
+    Index disease names, keyword table entries and per-disease common keywords
+
+    Args:
+        disease_db (dict): Disease name -> info
+        symptom_keywords (dict): Keyword -> disease names
+        common_keywords (dict): Disease name -> keyword list (e.g. from nlp_db)
+
+    Returns:
+        Autocomplete: Built index
+    """
+    index = Autocomplete()
+    for name in disease_db:
+        index.add(name, 'disease', [name])
+    for keyword, diseases in symptom_keywords.items():
+        index.add(keyword, 'keyword', diseases)
+    for name, keywords in (common_keywords or {}).items():
+        if name in disease_db:
+            for keyword in keywords:
+                index.add(keyword, 'keyword', [name])
+    return index.build()
+
+
+if __name__ == "__main__":
+    """Measure completion latency on the knowledge base"""
+    from nlp_db import SYMPTOM_DB, SYMPTOM_KEYWORDS
+
+    index = build_index(SYMPTOM_DB, SYMPTOM_KEYWORDS,
+                        {name: info['common_keywords'] for name, info in SYMPTOM_DB.items()})
+    runs = 100_000
+
+    for prefix in ('r', 'ro', 'rose', 'spot', 'white p', 'xyz'):
+        start = time.perf_counter()
+        for _ in range(runs):
+            index.complete(prefix)
+        us = (time.perf_counter() - start) / runs * 1e6
+        print(f"{prefix!r:10} {us:6.2f} µs  {[c['text'] for c in index.complete(prefix)]}")
@@ -0,0 +1,338 @@
+"""
+API Benchmark Module - Flower Disease Advisor
+Replays mixed chat/search/upload workloads against the Flask app and reports
+throughput, latency percentiles and memory
+
+Usage:
+    python benchmark_api.py --mode client --requests 500 --concurrency 8
+    python benchmark_api.py --mode server --duration 30 --output bench.json
+    python benchmark_api.py --url http://localhost:8000 --baseline bench.json
+"""
+
+import argparse
+import glob
+import http.cookiejar
+import io
+import json
+import os
+import random
+import resource
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+CHAT_MESSAGES = [
+    "white powdery coating on my rose",
+    "brown spots on lily petals",
+    "my tulip has scorch lesions and distorted blooms",
+    "orchid has dark patches at the base",
+    "rust colored patches on stems",
+]
+
+SYMPTOM_QUERIES = [
+    "powdery", "black spot", "rust", "brown spots", "pustules", "wilting", "stunted",
+]
+
+DEFAULT_MIX = "chat=4,search=4,upload=2"
+
+
+# ==================== WORKLOAD ====================
+
+def load_sample_images(pattern="*.[jJ][pP][gG]"):
+    """Read the repo's sample photos into memory once"""
+    images = []
+    for path in sorted(glob.glob(pattern)):
+        with open(path, 'rb') as f:
+            images.append((os.path.basename(path), f.read()))
+    if not images:
+        raise SystemExit("No sample .jpg files found for the upload workload")
+    return images
+
+
+def parse_mix(mix):
+    """'chat=4,search=4,upload=2' -> weighted list of operation names"""
+    ops = []
+    for part in mix.split(','):
+        name, weight = part.split('=')
+        ops.extend([name.strip()] * int(weight))
+    return ops
+
+
+def build_request(op, images, rng):
+    """
+    Describe one request of the workload
+
+    Returns:
+        tuple: (path, json_body or None, multipart fields or None)
+    """
+    if op == 'chat':
+        return '/api/chat-message', {'message': rng.choice(CHAT_MESSAGES)}, None
+    if op == 'search':
+        return '/api/search-symptoms', {'symptom': rng.choice(SYMPTOM_QUERIES)}, None
+    if op == 'upload':
+        name, data = rng.choice(images)
+        return '/api/upload-image-tab', None, {'file': (name, data), 'description': rng.choice(CHAT_MESSAGES)}
+    raise ValueError(f"Unknown operation: {op}")
+
+
+# ==================== DRIVERS ====================
+
+class ClientDriver:
+    """In-process Flask test client, one client (and session) per thread"""
+
+    def __init__(self, flask_app):
+        self.app = flask_app
+        self._local = threading.local()
+
+    def _client(self):
+        if not hasattr(self._local, 'client'):
+            self._local.client = self.app.test_client()
+        return self._local.client
+
+    def send(self, path, json_body, fields, method='POST'):
+        # Responses are closed so streamed bodies release their admission slot
+        client = self._client()
+        if method == 'GET':
+            with client.get(path) as resp:
+                return resp.status_code
+        if json_body is not None:
+            with client.post(path, json=json_body) as resp:
+                return resp.status_code
+
+        data = {}
+        for key, value in fields.items():
+            data[key] = (io.BytesIO(value[1]), value[0]) if isinstance(value, tuple) else value
+        with client.post(path, data=data, content_type='multipart/form-data') as resp:
+            return resp.status_code
+
+
+class HttpDriver:
+    """Real HTTP requests against a running server, one cookie jar per thread"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self._local = threading.local()
+
+    def _opener(self):
+        if not hasattr(self._local, 'opener'):
+            jar = http.cookiejar.CookieJar()
+            self._local.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(jar))
+        return self._local.opener
+
+    def send(self, path, json_body, fields, method='POST'):
+        if method == 'GET':
+            body, headers = None, {}
+        elif json_body is not None:
+            body, headers = json.dumps(json_body).encode(), {'Content-Type': 'application/json'}
+        else:
+            body, content_type = encode_multipart(fields)
+            headers = {'Content-Type': content_type}
+
+        req = urllib.request.Request(self.base_url + path, data=body, headers=headers, method=method)
+        try:
+            with self._opener().open(req, timeout=60) as resp:
+                resp.read()
+                return resp.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+
+def encode_multipart(fields):
+    """Encode form fields and (filename, bytes) files as multipart/form-data"""
+    boundary = uuid.uuid4().hex
+    parts = []
+    for key, value in fields.items():
+        if isinstance(value, tuple):
+            filename, data = value
+            header = (f'--{boundary}\r\nContent-Disposition: form-data; name="{key}"; '
+                      f'filename="{filename}"\r\nContent-Type: application/octet-stream\r\n\r\n')
+            parts.append(header.encode() + data + b'\r\n')
+        else:
+            header = f'--{boundary}\r\nContent-Disposition: form-data; name="{key}"\r\n\r\n'
+            parts.append(header.encode() + str(value).encode() + b'\r\n')
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+def start_local_server(flask_app):
+    """Serve the app on a free localhost port in a background thread"""
+    from werkzeug.serving import make_server
+
+    server = make_server('127.0.0.1', 0, flask_app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+# ==================== RUNNER ====================
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(q / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies):
+    """Latency percentiles in milliseconds"""
+    values = sorted(latencies)
+    return {
+        'count': len(values),
+        'p50_ms': round(percentile(values, 50) * 1000, 3) if values else None,
+        'p95_ms': round(percentile(values, 95) * 1000, 3) if values else None,
+        'p99_ms': round(percentile(values, 99) * 1000, 3) if values else None,
+    }
+
+
+def run_benchmark(driver, ops, images, total_requests, duration, concurrency, seed):
+    """
+    Drive the workload from `concurrency` threads
+
+    Stops after `total_requests` requests, or after `duration` seconds when given.
+
+    Returns:
+        dict: Throughput, overall and per-operation latency, error count
+    """
+    lock = threading.Lock()
+    latencies = {op: [] for op in set(ops)}
+    errors = {'count': 0}
+    issued = {'count': 0}
+    deadline = time.perf_counter() + duration if duration else None
+
+    def next_slot():
+        with lock:
+            if deadline is None and issued['count'] >= total_requests:
+                return False
+            issued['count'] += 1
+            return True
+
+    def worker(worker_id):
+        rng = random.Random(seed + worker_id)
+        while next_slot() and (deadline is None or time.perf_counter() < deadline):
+            op = rng.choice(ops)
+            path, json_body, fields = build_request(op, images, rng)
+            start = time.perf_counter()
+            try:
+                status = driver.send(path, json_body, fields)
+            except Exception:
+                status = 0
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies[op].append(elapsed)
+                if status >= 400 or status == 0:
+                    errors['count'] += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(worker, i) for i in range(concurrency)]:
+            future.result()
+    wall = time.perf_counter() - start
+
+    all_latencies = [v for values in latencies.values() for v in values]
+    return {
+        'requests': len(all_latencies),
+        'errors': errors['count'],
+        'wall_seconds': round(wall, 3),
+        'throughput_rps': round(len(all_latencies) / wall, 2) if wall else None,
+        'latency': summarize(all_latencies),
+        'per_operation': {op: summarize(values) for op, values in sorted(latencies.items())},
+    }
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process (includes the app in client/server mode)"""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+# ==================== REGRESSION CHECK ====================
+
+def compare_to_baseline(result, baseline, max_regression):
+    """
+    Flag throughput drops or p95/p99 increases beyond `max_regression`
+
+    Returns:
+        list: Human-readable regression messages (empty if none)
+    """
+    problems = []
+    if baseline.get('throughput_rps') and result['throughput_rps'] < baseline['throughput_rps'] * (1 - max_regression):
+        problems.append(f"throughput {result['throughput_rps']} < baseline {baseline['throughput_rps']}")
+
+    for key in ('p95_ms', 'p99_ms'):
+        old, new = baseline['latency'].get(key), result['latency'].get(key)
+        if old and new and new > old * (1 + max_regression):
+            problems.append(f"{key} {new} > baseline {old}")
+    return problems
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the Flower Disease Advisor API")
+    parser.add_argument("--mode", choices=("client", "server"), default="client",
+                        help="in-process test client or a real local HTTP server")
+    parser.add_argument("--url", default=None, help="benchmark an already running server instead")
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--duration", type=float, default=None, help="seconds; overrides --requests")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="write results as JSON")
+    parser.add_argument("--baseline", default=None, help="previous results JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.10)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    images = load_sample_images()
+    ops = parse_mix(args.mix)
+
+    server = None
+    if args.url:
+        driver, target = HttpDriver(args.url), args.url
+    else:
+        # Every benchmark client shares one loopback address; don't rate-limit it as one user
+        os.environ.setdefault('ADMISSION_EXEMPT_LOOPBACK', '1')
+        from app import app as flask_app
+        if args.mode == 'server':
+            server, url = start_local_server(flask_app)
+            driver, target = HttpDriver(url), url
+        else:
+            driver, target = ClientDriver(flask_app), 'test-client'
+
+    try:
+        result = run_benchmark(driver, ops, images, args.requests, args.duration, args.concurrency, args.seed)
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    result.update({
+        'target': target,
+        'mode': 'remote' if args.url else args.mode,
+        'mix': args.mix,
+        'concurrency': args.concurrency,
+        'peak_rss_mb': None if args.url else peak_rss_mb(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    })
+    print(json.dumps(result, indent=2))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            problems = compare_to_baseline(result, json.load(f), args.max_regression)
+        if problems:
+            print("❌ Regression detected:\n  " + "\n  ".join(problems))
+            sys.exit(1)
+        print("✅ No regression against baseline")
+
+
+if __name__ == "__main__":
+    main()
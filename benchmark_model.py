@@ -0,0 +1,107 @@
+"""
+Model Benchmark Module - Flower Disease Advisor
+Compares size, load time, CPU latency and accuracy of exported model artifacts
+
+Usage:
+    python benchmark_model.py plant_model.h5 plant_model_float16.tflite plant_model_int8.tflite
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+import train
+from model_backend import load_backend
+
+
+# ==================== DATA ====================
+
+def load_validation_arrays(dataset_path, limit):
+    """
+    Materialize the validation split from train.py as numpy arrays
+
+    Returns:
+        tuple: (images, labels)
+    """
+    _, valid_data = train.load_datasets(dataset_path)
+    images, labels = [], []
+    for batch_images, batch_labels in train.normalize(valid_data).unbatch().take(limit):
+        images.append(batch_images.numpy())
+        labels.append(int(batch_labels.numpy()))
+    return np.stack(images), np.asarray(labels)
+
+
+# ==================== MEASUREMENTS ====================
+
+def benchmark_artifact(model_path, images, labels, latency_runs, num_threads):
+    """
+    Measure one artifact
+
+    Returns:
+        dict: size, load time, latency percentiles and accuracy
+    """
+    start = time.perf_counter()
+    backend = load_backend(model_path, num_threads=num_threads)
+    load_seconds = time.perf_counter() - start
+
+    # Warm up once so allocation is not counted as latency
+    backend.predict(images[:1])
+
+    timings = []
+    for i in range(latency_runs):
+        sample = images[i % len(images)][np.newaxis]
+        start = time.perf_counter()
+        backend.predict(sample)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    correct = 0
+    for i in range(len(images)):
+        probs = backend.predict(images[i][np.newaxis])[0]
+        correct += int(np.argmax(probs) == labels[i])
+
+    return {
+        'model': model_path,
+        'precision': backend.precision,
+        'size_kb': round(os.path.getsize(model_path) / 1024, 1),
+        'load_ms': round(load_seconds * 1000, 2),
+        'latency_p50_ms': round(float(np.percentile(timings, 50)), 3),
+        'latency_p95_ms': round(float(np.percentile(timings, 95)), 3),
+        'accuracy': round(correct / len(images), 4),
+    }
+
+
+def print_table(results):
+    """Print results as an aligned table"""
+    header = f"{'precision':<10}{'size KB':>12}{'load ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'accuracy':>10}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['precision']:<10}{r['size_kb']:>12}{r['load_ms']:>10}"
+              f"{r['latency_p50_ms']:>10}{r['latency_p95_ms']:>10}{r['accuracy']:>10}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark float32/float16/int8 model artifacts")
+    parser.add_argument("models", nargs="+")
+    parser.add_argument("--dataset", default=train.dataset_path)
+    parser.add_argument("--samples", type=int, default=500, help="validation images used for accuracy")
+    parser.add_argument("--latency-runs", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=1, help="TFLite interpreter threads")
+    parser.add_argument("--output", default="model_benchmark.json")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    images, labels = load_validation_arrays(args.dataset, args.samples)
+    results = [
+        benchmark_artifact(path, images, labels, args.latency_runs, args.threads)
+        for path in args.models
+    ]
+    print_table(results)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n📄 Results written to {args.output}")
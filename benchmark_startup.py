@@ -0,0 +1,161 @@
+"""
+Startup Benchmark Module - Flower Disease Advisor
+Measures import time, first-request latency and per-worker memory of forked workers,
+with and without prewarming in the master
+
+Each mode runs in a fresh interpreter: import app, optionally app.prewarm(before_fork=True),
+fork N workers, send every worker one image upload, then read each worker's
+memory from /proc while all of them are alive (Linux only).
+
+Usage:
+    python benchmark_startup.py --workers 4
+    MODEL_PATH=plant_model_int8.tflite python benchmark_startup.py --workers 4 --output startup.json
+"""
+
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+
+MODES = ("lazy", "prewarm")
+
+
+# ==================== MEMORY ====================
+
+def memory_mb(pid):
+    """
+    Rss, Pss and private memory of a process in MB
+
+    Pss splits shared pages between the processes sharing them, so it shows
+    how much copy-on-write sharing with the master actually saves.
+    """
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1]) / 1024
+    return {
+        'rss_mb': round(fields.get('Rss', 0), 1),
+        'pss_mb': round(fields.get('Pss', 0), 1),
+        'private_mb': round(fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0), 1),
+    }
+
+
+# ==================== CHILD ====================
+
+def run_mode(mode, workers):
+    """Body of one benchmark interpreter; returns the measurements"""
+    start = time.perf_counter()
+    import app as app_module
+    import_seconds = time.perf_counter() - start
+
+    master_prewarm = app_module.prewarm(before_fork=True) if mode == "prewarm" else {}
+
+    from benchmark_api import load_sample_images
+    name, data = load_sample_images()[0]
+
+    children = []
+    for _ in range(workers):
+        ready_r, ready_w = os.pipe()
+        go_r, go_w = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(ready_r)
+            os.close(go_w)
+            # Drop the pipe ends inherited from earlier workers, or they never see EOF
+            for _, other_ready_r, other_go_w in children:
+                os.close(other_ready_r)
+                os.close(other_go_w)
+            result = {}
+            if mode == "prewarm":
+                result['worker_prewarm'] = app_module.prewarm()
+
+            client = app_module.app.test_client()
+            start = time.perf_counter()
+            response = client.post('/api/upload-image-tab', data={'file': (io.BytesIO(data), name)},
+                                   content_type='multipart/form-data')
+            result['first_request_ms'] = round((time.perf_counter() - start) * 1000, 2)
+            result['status'] = response.status_code
+
+            os.write(ready_w, json.dumps(result).encode())
+            os.close(ready_w)
+            os.read(go_r, 1)  # stay alive until the parent has measured memory
+            os._exit(0)
+
+        os.close(ready_w)
+        os.close(go_r)
+        children.append((pid, ready_r, go_w))
+
+    results = []
+    for pid, ready_r, _ in children:
+        with os.fdopen(ready_r) as f:
+            result = json.loads(f.read())
+        result.update(memory_mb(pid))
+        results.append(result)
+
+    for pid, _, go_w in children:
+        os.close(go_w)
+        os.waitpid(pid, 0)
+
+    return {
+        'mode': mode,
+        'import_seconds': round(import_seconds, 3),
+        'master_prewarm': {k: round(v, 3) for k, v in master_prewarm.items()},
+        'master': memory_mb(os.getpid()),
+        'workers': results,
+        'total_worker_pss_mb': round(sum(r['pss_mb'] for r in results), 1),
+        'mean_first_request_ms': round(sum(r['first_request_ms'] for r in results) / len(results), 2),
+    }
+
+
+# ==================== PARENT ====================
+
+def measure(mode, workers):
+    """Run one mode in a fresh interpreter so nothing is already imported"""
+    with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as f:
+        result_path = f.name
+    try:
+        subprocess.run([sys.executable, __file__, "--child", mode, "--workers", str(workers),
+                        "--result", result_path], check=True)
+        with open(result_path) as f:
+            return json.load(f)
+    finally:
+        os.remove(result_path)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Measure cold start and per-worker memory")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    if args.child:
+        with open(args.result, 'w') as f:
+            json.dump(run_mode(args.child, args.workers), f)
+        sys.exit(0)
+
+    print(f"Model: {os.environ.get('MODEL_PATH') or 'demo mode'}, {args.workers} workers")
+    report = [measure(mode, args.workers) for mode in args.modes]
+
+    print(f"{'mode':<8} {'import s':>9} {'1st req ms':>11} {'worker Pss MB':>14} {'worker private MB':>18}")
+    for r in report:
+        private = sum(w['private_mb'] for w in r['workers']) / len(r['workers'])
+        print(f"{r['mode']:<8} {r['import_seconds']:>9.3f} {r['mean_first_request_ms']:>11.2f} "
+              f"{r['total_worker_pss_mb'] / len(r['workers']):>14.1f} {private:>18.1f}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
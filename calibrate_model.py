@@ -0,0 +1,167 @@
+"""
+Calibration Module - Flower Disease Advisor
+Fits a softmax temperature on train.py's validation split and measures the TTA cost
+
+Single-pass and TTA outputs get separate temperatures (averaging the augmented
+views already softens the distribution). Both are written to
+<model>.calibration.json, where load_backend picks them up, so every artifact
+(.h5 or exported .tflite) is calibrated separately.
+
+Usage:
+    python calibrate_model.py --model plant_model.h5
+    python calibrate_model.py --model plant_model_int8.tflite --timing-images 32
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+import train
+from model_backend import (
+    apply_temperature, calibration_path, fit_temperature, load_backend,
+    negative_log_likelihood, predict_tta, tta_views
+)
+
+
+# ==================== DATA ====================
+
+def validation_arrays(dataset_path):
+    """
+    Validation images and labels from the split train.py holds out
+
+    Returns:
+        tuple: (float32 RGB images scaled to [0, 1], int labels)
+    """
+    _, valid_data = train.load_datasets(dataset_path)
+    images, labels = [], []
+    for x, y in train.normalize(valid_data):
+        images.append(x.numpy())
+        labels.append(y.numpy())
+    return np.concatenate(images), np.concatenate(labels)
+
+
+def batched_predict(backend, images, batch_size=train.BATCH_SIZE):
+    return np.concatenate([backend.predict(images[i:i + batch_size])
+                           for i in range(0, len(images), batch_size)])
+
+
+def to_bgr(images):
+    """Validation arrays back to uint8 BGR, the layout cv2.imread returns"""
+    return [(img[..., ::-1] * 255).astype(np.uint8) for img in images]
+
+
+def tta_view_probs(backend, images, batch_size=train.BATCH_SIZE):
+    """
+    Uncalibrated probabilities of every TTA view
+
+    Returns:
+        np.ndarray: (n, views, classes)
+    """
+    chunks = []
+    for i in range(0, len(images), batch_size):
+        views = np.stack([tta_views(img, backend.input_size) for img in to_bgr(images[i:i + batch_size])])
+        n, per_image = views.shape[:2]
+        chunks.append(backend.predict(views.reshape(n * per_image, *views.shape[2:])).reshape(n, per_image, -1))
+    return np.concatenate(chunks)
+
+
+# ==================== METRICS ====================
+
+def expected_calibration_error(probs, labels, bins=15):
+    """Gap between confidence and accuracy, averaged over confidence bins"""
+    confidence = probs.max(axis=1)
+    correct = probs.argmax(axis=1) == labels
+    edges = np.linspace(0, 1, bins + 1)
+    ece = 0.0
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        mask = (confidence > lo) & (confidence <= hi)
+        if mask.any():
+            ece += mask.mean() * abs(confidence[mask].mean() - correct[mask].mean())
+    return float(ece)
+
+
+def time_tta(backend, images, repeats=3):
+    """
+    Per-image latency of a single pass vs. batched TTA on the same images
+
+    Returns:
+        dict: Milliseconds per image for each mode and the TTA/single ratio
+    """
+    # predict_tta expects images as decoded by cv2: uint8 BGR
+    bgr = to_bgr(images)
+
+    def best_of(fn):
+        fn()  # warm-up
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+        return min(times) * 1000 / len(images)
+
+    single_ms = best_of(lambda: backend.predict(images))
+    tta_ms = best_of(lambda: predict_tta(backend, bgr))
+    return {
+        'single_ms_per_image': round(single_ms, 3),
+        'tta_ms_per_image': round(tta_ms, 3),
+        'tta_cost_ratio': round(tta_ms / single_ms, 2),
+    }
+
+
+# ==================== MAIN ====================
+
+def calibrate(model_path, dataset_path, timing_images):
+    backend = load_backend(model_path)
+    images, labels = validation_arrays(dataset_path)
+    probs = batched_predict(backend, images)
+
+    temperature = fit_temperature(probs, labels)
+    calibrated = apply_temperature(probs, temperature)
+    report = {
+        'temperature': round(temperature, 4),
+        'validation_images': int(len(labels)),
+        'accuracy': round(float(np.mean(probs.argmax(axis=1) == labels)), 4),
+        'nll_before': round(negative_log_likelihood(probs, labels), 4),
+        'nll_after': round(negative_log_likelihood(calibrated, labels), 4),
+        'ece_before': round(expected_calibration_error(probs, labels), 4),
+        'ece_after': round(expected_calibration_error(calibrated, labels), 4),
+    }
+
+    view_probs = tta_view_probs(backend, images)
+    tta_temperature = fit_temperature(view_probs, labels)
+    tta_before = view_probs.mean(axis=1)
+    tta_after = apply_temperature(view_probs, tta_temperature).mean(axis=1)
+    report.update({
+        'temperatures': {'single': round(temperature, 4), 'tta': round(tta_temperature, 4)},
+        'tta_accuracy': round(float(np.mean(tta_after.argmax(axis=1) == labels)), 4),
+        'tta_nll_before': round(negative_log_likelihood(tta_before, labels), 4),
+        'tta_nll_after': round(negative_log_likelihood(tta_after, labels), 4),
+        'tta_ece_before': round(expected_calibration_error(tta_before, labels), 4),
+        'tta_ece_after': round(expected_calibration_error(tta_after, labels), 4),
+    })
+
+    backend.temperature = temperature
+    backend.tta_temperature = tta_temperature
+    report.update(time_tta(backend, images[:timing_images]))
+
+    with open(calibration_path(model_path), 'w') as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Fit temperature calibration for a model artifact")
+    parser.add_argument("--model", default=train.MODEL_PATH)
+    parser.add_argument("--dataset", default=train.dataset_path)
+    parser.add_argument("--timing-images", type=int, default=16,
+                        help="Validation images used to compare single-pass and TTA latency")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = calibrate(args.model, args.dataset, args.timing_images)
+    print(json.dumps(report, indent=2))
+    print(f"✅ Calibration saved to {calibration_path(args.model)}")
@@ -0,0 +1,210 @@
+"""
+Capture Module - Flower Disease Advisor
+Appends anonymized request records to a rotating JSONL file for traffic replay
+
+Each line looks like:
+    {"ts": 1760000000.123, "method": "POST", "route": "/api/upload-image-tab",
+     "path": "/api/upload-image-tab", "status": 200, "payload_bytes": 183422,
+     "duration_ms": 41.2, "user": "3f2a9c1b7d4e", "text": "brown spots on petals",
+     "image_hash": "9b1c..."}
+"""
+
+import hashlib
+import hmac
+import json
+import os
+import queue
+import threading
+import time
+
+from flask import g, request, session
+
+try:
+    import fcntl
+except ImportError:   # Windows: single-process dev server only
+    fcntl = None
+
+
+CAPTURE_ENABLED = os.environ.get('CAPTURE_REQUESTS', '0') == '1'
+CAPTURE_PATH = os.environ.get('CAPTURE_PATH', 'captures/requests.jsonl')
+
+# Keyed hashing so user ids cannot be reversed from the log. Set CAPTURE_SALT (or
+# app.config['CAPTURE_SALT']) to keep pseudonyms stable across deployments; otherwise
+# it is derived from the app's secret key, which every worker shares
+CAPTURE_SALT = os.environ.get('CAPTURE_SALT', '')
+
+# Request fields that carry the user's free text, by route
+TEXT_FIELDS = {
+    '/api/chat-message': 'message',
+    '/api/search-symptoms': 'symptom',
+    '/api/search-keyword': 'keyword',
+}
+
+
+# ==================== WRITER ====================
+
+class CaptureWriter:
+    """
+    Buffered background writer with size-based rotation
+
+    Requests only put a dict on a bounded queue; a daemon thread hashes
+    uploaded files, serializes and writes in batches. When the queue is full
+    records are dropped (and counted) rather than slowing requests down.
+    Every gunicorn worker has its own writer on the same file, so each write
+    and rotation holds an exclusive flock on <path>.lock.
+    """
+
+    def __init__(self, path, max_bytes=50 * 1024 * 1024, backups=5, queue_size=10000, flush_interval=1.0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.errors = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._thread = None
+        self._thread_pid = None
+        self._thread_lock = threading.Lock()
+
+    def _ensure_thread(self):
+        """Start the writer in this process; threads do not survive a preforking server's fork"""
+        if self._thread_pid != os.getpid():
+            with self._thread_lock:
+                if self._thread_pid != os.getpid():
+                    self._queue = queue.Queue(maxsize=self._queue.maxsize)
+                    self._thread = threading.Thread(target=self._run, name='capture-writer', daemon=True)
+                    self._thread.start()
+                    self._thread_pid = os.getpid()
+
+    def submit(self, record):
+        """Queue a record without blocking the request"""
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while time.monotonic() < deadline:
+                try:
+                    batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            except Exception as e:
+                # Lose this batch, not the writer: a dead thread would silently stop capturing
+                self.errors += 1
+                print(f"⚠️ Capture write failed, {len(batch)} records lost: {e}")
+
+    def _write(self, batch):
+        lines = []
+        for record in batch:
+            image_path = record.pop('image_path', None)
+            if image_path:
+                record['image_hash'] = file_sha256(image_path)
+            lines.append(json.dumps(record, ensure_ascii=False))
+
+        with open(self.path + '.lock', 'a') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)   # released when the lock file is closed
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n')
+
+            if os.path.getsize(self.path) >= self.max_bytes:
+                self._rotate()
+
+    def _rotate(self):
+        """requests.jsonl -> requests.jsonl.1 -> ... -> requests.jsonl.<backups>"""
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+
+def file_sha256(path):
+    """Content hash of an uploaded file, or None if it is gone"""
+    h = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                h.update(chunk)
+    except OSError:
+        return None
+    return h.hexdigest()
+
+
+def capture_salt(app):
+    """Salt from config or CAPTURE_SALT, else derived from the secret key (random as a last resort)"""
+    salt = app.config.get('CAPTURE_SALT') or CAPTURE_SALT
+    if salt:
+        return salt
+    if app.secret_key:
+        key = app.secret_key if isinstance(app.secret_key, bytes) else app.secret_key.encode('utf-8')
+        return hmac.new(key, b'capture-salt', hashlib.sha256).hexdigest()
+    print("⚠️ No CAPTURE_SALT or secret key; capture pseudonyms will differ per process")
+    return os.urandom(16).hex()
+
+
+def anonymize(user, salt):
+    """Stable pseudonym for a username under a salt"""
+    if not user:
+        return None
+    return hmac.new(salt.encode('utf-8'), user.encode('utf-8'), hashlib.sha256).hexdigest()[:12]
+
+
+def request_text(route):
+    """Free text sent with the request, if any"""
+    if route in TEXT_FIELDS:
+        data = request.get_json(silent=True) or {}
+        return data.get(TEXT_FIELDS[route])
+    return request.form.get('description') if request.form else None
+
+
+# ==================== FLASK INTEGRATION ====================
+
+def init_app(app, path=CAPTURE_PATH, enabled=CAPTURE_ENABLED):
+    """Register the capture middleware when enabled"""
+    if not enabled:
+        return None
+
+    writer = CaptureWriter(path)
+    salt = capture_salt(app)
+
+    @app.before_request
+    def _capture_start():
+        g.capture_start = time.perf_counter()
+
+    @app.after_request
+    def _capture_record(response):
+        start = g.pop('capture_start', None)
+        if start is None or request.url_rule is None or request.endpoint == 'static':
+            return response
+        # Streamed responses (the batch upload) are still running here and carry
+        # several files, so their record could not be replayed faithfully
+        if response.is_streamed:
+            return response
+
+        route = request.url_rule.rule
+        writer.submit({
+            'ts': time.time(),
+            'method': request.method,
+            'route': route,
+            'path': request.path,
+            'status': response.status_code,
+            'payload_bytes': request.content_length or 0,
+            'duration_ms': round((time.perf_counter() - start) * 1000, 3),
+            'user': anonymize(session.get('user'), salt),
+            'text': request_text(route),
+            # Hashed by the writer thread, off the request path
+            'image_path': g.get('upload_path'),
+        })
+        return response
+
+    return writer
@@ -0,0 +1,102 @@
+"""
+Catalog Cache Module - Flower Disease Advisor
+Pre-serialized, pre-compressed JSON bodies for read-only endpoints, with ETag revalidation
+"""
+
+import gzip
+import hashlib
+import json
+import threading
+
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Clients may reuse a body this long, then revalidate cheaply with If-None-Match
+CACHE_CONTROL = "public, max-age=60, must-revalidate"
+
+
+class CachedBody:
+    """One JSON payload serialized once, in every encoding we can serve"""
+
+    def __init__(self, payload):
+        self.payload = payload
+        self.identity = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        self.etag = hashlib.sha256(self.identity).hexdigest()[:32]
+        self.encoded = {'gzip': gzip.compress(self.identity, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            self.encoded['br'] = brotli.compress(self.identity)
+
+    def etags(self):
+        """Strong ETag of every representation (each encoding is a different byte stream)"""
+        return [self.etag] + [f"{self.etag}-{encoding}" for encoding in self.encoded]
+
+
+class CatalogCache:
+    """
+    Response bodies built from the knowledge base on first use
+
+    build_fn returns {key: JSON-serializable payload}. Everything is rebuilt
+    lazily after invalidate(), which whoever edits the knowledge base must call.
+    """
+
+    def __init__(self, build_fn):
+        self.build_fn = build_fn
+        self._bodies = None
+        self._lock = threading.Lock()
+
+    def _get_bodies(self):
+        bodies = self._bodies
+        if bodies is None:
+            with self._lock:
+                if self._bodies is None:
+                    self._bodies = {key: CachedBody(payload) for key, payload in self.build_fn().items()}
+                bodies = self._bodies
+        return bodies
+
+    def invalidate(self):
+        """Drop every cached body; the next request rebuilds them"""
+        with self._lock:
+            self._bodies = None
+
+    def payload(self, key):
+        """The cached Python object behind a body (treat as read-only)"""
+        return self._get_bodies()[key].payload
+
+    def __contains__(self, key):
+        return key in self._get_bodies()
+
+    def respond(self, key):
+        """
+        Serve a cached body for the current request
+
+        Returns 304 when If-None-Match already names this content, otherwise the
+        smallest encoding the client accepts. Either way the ETag is that of the
+        negotiated encoding.
+        """
+        body = self._get_bodies()[key]
+
+        encoding = None
+        for candidate in ('br', 'gzip'):
+            if candidate in body.encoded and request.accept_encodings[candidate]:
+                encoding = candidate
+                break
+        # A 304 must carry the ETag of the representation this client would get
+        etag = f"{body.etag}-{encoding}" if encoding else body.etag
+
+        if any(request.if_none_match.contains(tag) for tag in body.etags()):
+            response = Response(status=304)
+        elif encoding is None:
+            response = Response(body.identity, mimetype='application/json')
+        else:
+            response = Response(body.encoded[encoding], mimetype='application/json')
+            response.headers['Content-Encoding'] = encoding
+        response.set_etag(etag)
+
+        response.headers['Cache-Control'] = CACHE_CONTROL
+        response.headers['Vary'] = 'Accept-Encoding'
+        return response
@@ -0,0 +1,171 @@
+"""
+Architecture Comparison Module - Flower Disease Advisor
+Reports params, FLOPs, CPU latency and validation accuracy for each train.py preset
+
+Usage:
+    python compare_architectures.py --epochs 3
+    python compare_architectures.py --no-train      # params/FLOPs/latency only
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import tensorflow as tf
+
+import train
+from model_backend import load_class_names
+
+
+# ==================== FLOPS ====================
+
+def count_flops(model):
+    """
+    Count multiply-accumulate FLOPs (2 per MAC) of one forward pass
+
+    Only convolution and dense layers are counted; pooling, BN and
+    activations are negligible next to them.
+
+    Args:
+        model (tf.keras.Model): Built model
+
+    Returns:
+        int: FLOPs for a single image
+    """
+    flops = 0
+    for layer in model.layers:
+        # layer.output/.input exist in Keras 2 and 3; output_shape/input_shape are Keras 2 only
+        out_shape = layer.output.shape
+        if isinstance(layer, tf.keras.layers.DepthwiseConv2D):
+            kh, kw = layer.kernel_size
+            _, oh, ow, oc = out_shape
+            flops += 2 * oh * ow * oc * kh * kw
+        elif isinstance(layer, tf.keras.layers.Conv2D):
+            kh, kw = layer.kernel_size
+            in_channels = layer.input.shape[-1]
+            _, oh, ow, oc = out_shape
+            flops += 2 * oh * ow * oc * kh * kw * in_channels
+        elif isinstance(layer, tf.keras.layers.Dense):
+            flops += 2 * layer.input.shape[-1] * layer.units
+    return flops
+
+
+# ==================== LATENCY ====================
+
+def measure_latency(model, runs):
+    """
+    Median single-image CPU latency in milliseconds
+
+    Args:
+        model (tf.keras.Model): Model to time
+        runs (int): Timed iterations after warm-up
+
+    Returns:
+        float: p50 latency in ms
+    """
+    sample = np.random.rand(1, *train.IMAGE_SIZE, 3).astype(np.float32)
+    predict = tf.function(lambda x: model(x, training=False))
+    predict(sample)
+
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        predict(sample).numpy()
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.percentile(timings, 50))
+
+
+# ==================== REPORT ====================
+
+def count_classes(dataset_path):
+    """
+    Number of classes without loading images: the dataset's class folders,
+    else the class list saved next to train.py's model
+
+    Raises:
+        SystemExit: If neither exists (pass --num-classes instead)
+    """
+    if os.path.isdir(dataset_path):
+        folders = [d for d in os.listdir(dataset_path) if os.path.isdir(os.path.join(dataset_path, d))]
+        if folders:
+            return len(folders)
+    classes = load_class_names(train.MODEL_PATH)
+    if classes:
+        return len(classes)
+    raise SystemExit(f"No class folders in {dataset_path} and no {train.CLASSES_PATH}; pass --num-classes")
+
+
+def compare(archs, epochs, dataset_path, latency_runs, do_train, num_classes=None):
+    """
+    Build (and optionally train) each preset and collect metrics
+
+    Args:
+        num_classes (int): Output classes when not training; derived from the
+            dataset or the saved class list if None
+
+    Returns:
+        list: One result dict per architecture
+    """
+    if do_train:
+        train_data, valid_data = train.load_datasets(dataset_path)
+        num_classes = len(train_data.class_names)
+        train_data = train.normalize(train_data)
+        valid_data = train.normalize(valid_data)
+    elif num_classes is None:
+        num_classes = count_classes(dataset_path)
+
+    results = []
+    for arch in archs:
+        model = train.build_model(num_classes, arch)
+        result = {
+            'arch': arch,
+            'params': int(model.count_params()),
+            'flops': count_flops(model),
+            'latency_p50_ms': round(measure_latency(model, latency_runs), 3),
+            'val_accuracy': None,
+        }
+
+        if do_train:
+            model.compile(optimizer="adam", loss="sparse_categorical_crossentropy", metrics=["accuracy"])
+            history = model.fit(train_data, validation_data=valid_data, epochs=epochs, verbose=2)
+            result['val_accuracy'] = round(float(max(history.history['val_accuracy'])), 4)
+
+        results.append(result)
+    return results
+
+
+def print_table(results):
+    """Print results as an aligned table"""
+    header = f"{'arch':<12}{'params':>12}{'MFLOPs':>10}{'p50 ms':>10}{'val acc':>10}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        acc = "-" if r['val_accuracy'] is None else r['val_accuracy']
+        print(f"{r['arch']:<12}{r['params']:>12,}{r['flops'] / 1e6:>10.1f}"
+              f"{r['latency_p50_ms']:>10}{acc:>10}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Compare train.py architecture presets")
+    parser.add_argument("--archs", nargs="+", choices=sorted(train.ARCHITECTURES),
+                        default=sorted(train.ARCHITECTURES))
+    parser.add_argument("--dataset", default=train.dataset_path)
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--latency-runs", type=int, default=100)
+    parser.add_argument("--no-train", action="store_true", help="skip training, no accuracy column")
+    parser.add_argument("--num-classes", type=int, default=None,
+                        help="output classes with --no-train (default: from the dataset or class list)")
+    parser.add_argument("--output", default="architecture_report.json")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = compare(args.archs, args.epochs, args.dataset, args.latency_runs, not args.no_train,
+                      args.num_classes)
+    print_table(results)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\n📄 Report written to {args.output}")
@@ -0,0 +1,332 @@
+"""
+Evaluation Module - Flower Disease Advisor
+Streams a labeled dataset through a model artifact with the production preprocessing
+and reports a confusion matrix, per-class precision/recall and images/sec
+
+Labels come from class folders (dataset/<class>/*.jpg) or a COCO file
+(_annotations.coco.json): an image's label is its largest annotated box whose
+category is one of the model's classes (--label-map renames categories first).
+
+Every prediction is appended to <output>.predictions.jsonl as soon as its
+batch finishes, so an interrupted run continues where it stopped when started
+again with the same arguments. The report is rebuilt from that file.
+
+Usage:
+    python evaluate.py --model plant_model.h5 --dataset dataset
+    python evaluate.py --model plant_model_int8.tflite --dataset _annotations.coco.json --mode tta
+    python evaluate.py --model plant_model.h5 --dataset dataset --output eval_v3 --restart
+"""
+
+import argparse
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from lazy_imports import lazy_import
+from model_backend import apply_temperature, load_backend, predict_tta, preprocess_image
+
+cv2 = lazy_import('cv2')
+
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp')
+BATCH_SIZE = 32
+REPORT_EVERY = 20   # batches between report rewrites
+
+
+# ==================== DATASETS ====================
+
+def folder_samples(root):
+    """(path, label) for every image under root/<class>/"""
+    for label in sorted(os.listdir(root)):
+        class_dir = os.path.join(root, label)
+        if not os.path.isdir(class_dir):
+            continue
+        for name in sorted(os.listdir(class_dir)):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                yield os.path.join(class_dir, name), label
+
+
+def coco_samples(annotations_path, class_names, label_map=None):
+    """
+    (path, label) for every COCO image with an annotation in class_names
+
+    Images are paired with the category of their largest box; images whose
+    boxes are all outside the model's classes are skipped.
+    """
+    with open(annotations_path) as f:
+        coco = json.load(f)
+    label_map = label_map or {}
+    known = set(class_names)
+    categories = {c['id']: label_map.get(c['name'], c['name']) for c in coco['categories']}
+
+    largest = {}
+    for ann in coco['annotations']:
+        label = categories.get(ann['category_id'])
+        area = ann.get('area') or ann['bbox'][2] * ann['bbox'][3]
+        if label in known and area > largest.get(ann['image_id'], (0, None))[0]:
+            largest[ann['image_id']] = (area, label)
+
+    image_dir = os.path.dirname(os.path.abspath(annotations_path))
+    for image in sorted(coco['images'], key=lambda i: i['file_name']):
+        if image['id'] in largest:
+            yield os.path.join(image_dir, image['file_name']), largest[image['id']][1]
+
+
+def load_samples(dataset, class_names, label_map=None):
+    if os.path.isdir(dataset):
+        samples = folder_samples(dataset)
+        if label_map:
+            samples = ((path, label_map.get(label, label)) for path, label in samples)
+        return samples
+    return coco_samples(dataset, class_names, label_map)
+
+
+def batches(samples, size):
+    batch = []
+    for sample in samples:
+        batch.append(sample)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# ==================== RESUMABLE OUTPUT ====================
+
+def read_predictions(path, run_info):
+    """
+    Predictions already written by an earlier run with the same model and mode
+
+    Raises:
+        SystemExit: If the file was written for another model or mode
+    """
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        lines = f.readlines()
+    if not lines:
+        return []
+
+    header = json.loads(lines[0])
+    if header != run_info:
+        raise SystemExit(f"{path} belongs to another run ({header}); use --restart or another --output")
+    records = []
+    for line in lines[1:]:
+        try:
+            records.append(json.loads(line))
+        except json.JSONDecodeError:
+            break   # last line cut off by the interruption
+    return records
+
+
+def open_predictions(path, run_info, records):
+    """Rewrite the intact records (dropping a torn last line) and reopen for appending"""
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        f.write(json.dumps(run_info) + '\n')
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+    os.replace(tmp, path)
+    return open(path, 'a', buffering=1)
+
+
+# ==================== INFERENCE ====================
+
+def decode(path):
+    """Decode one image, timing it"""
+    start = time.perf_counter()
+    img = cv2.imread(path)
+    return img, (time.perf_counter() - start) * 1000
+
+
+def predict_batch(backend, images, mode):
+    """Calibrated probabilities exactly as app.predict_images computes them"""
+    if mode == 'tta':
+        probs, _ = predict_tta(backend, images)
+        return probs
+    batch = np.stack([preprocess_image(img, backend.input_size) for img in images])
+    return apply_temperature(backend.predict(batch), backend.temperature)
+
+
+def evaluate(model_path, dataset, output, mode='single', batch_size=BATCH_SIZE, label_map=None,
+             limit=None, restart=False):
+    """
+    Run (or resume) an evaluation
+
+    Decoding of the next batch overlaps inference of the current one.
+
+    Returns:
+        dict: The final report, also written to <output>.json
+    """
+    backend = load_backend(model_path)
+    class_names = backend.class_names
+    run_info = {'model': os.path.abspath(model_path), 'dataset': os.path.abspath(dataset), 'mode': mode}
+
+    predictions_path = output + '.predictions.jsonl'
+    if restart and os.path.exists(predictions_path):
+        os.remove(predictions_path)
+    records = read_predictions(predictions_path, run_info)
+    done = {r['path'] for r in records}
+    if done:
+        print(f"Resuming: {len(done)} images already evaluated")
+
+    todo = (s for s in load_samples(dataset, class_names, label_map) if s[0] not in done)
+    if limit:
+        todo = itertools.islice(todo, max(0, limit - len(done)))
+
+    out = open_predictions(predictions_path, run_info, records)
+    resumed_from, start = len(records), time.perf_counter()
+    pool = ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 2))
+    try:
+        pending = None
+        for index, batch in enumerate(batches(todo, batch_size)):
+            decoded = pool.map(decode, [path for path, _ in batch])
+            if pending:
+                records.extend(run_batch(backend, *pending, mode, out))
+            pending = (batch, decoded)
+            if index % REPORT_EVERY == REPORT_EVERY - 1:
+                report = build_report(records, class_names, run_info)
+                write_report(report, output)
+                print(f"{report['images']} images, accuracy {report['accuracy']}, {report['images_per_sec']} img/s")
+        if pending:
+            records.extend(run_batch(backend, *pending, mode, out))
+    finally:
+        pool.shutdown()
+        out.close()
+
+    report = build_report(records, class_names, run_info)
+    elapsed = time.perf_counter() - start
+    # Wall clock of this run only, with decoding overlapped with inference
+    report['wall_images_per_sec'] = round((len(records) - resumed_from) / elapsed, 1) if elapsed else None
+    write_report(report, output)
+    return report
+
+
+def run_batch(backend, batch, decoded, mode, out):
+    """Predict one batch and append its records"""
+    decoded = list(decoded)
+    usable = [i for i, (img, _) in enumerate(decoded) if img is not None]
+    records = []
+
+    if usable:
+        start = time.perf_counter()
+        probs = predict_batch(backend, [decoded[i][0] for i in usable], mode)
+        infer_ms = (time.perf_counter() - start) * 1000 / len(usable)
+        for i, p in zip(usable, probs):
+            idx = int(np.argmax(p))
+            records.append({
+                'path': batch[i][0],
+                'label': batch[i][1],
+                'predicted': backend.class_names[idx] if idx < len(backend.class_names) else str(idx),
+                'confidence': round(float(p[idx]), 4),
+                'ms': round(decoded[i][1] + infer_ms, 3),
+            })
+    for i, (img, _) in enumerate(decoded):
+        if img is None:
+            records.append({'path': batch[i][0], 'label': batch[i][1], 'predicted': None, 'error': 'unreadable'})
+
+    for record in records:
+        out.write(json.dumps(record) + '\n')
+    return records
+
+
+# ==================== REPORT ====================
+
+def build_report(records, class_names, run_info):
+    """
+    Confusion matrix, per-class precision/recall/F1 and throughput from the records
+
+    Throughput counts decode plus inference time (decoding overlaps inference
+    when running, so wall-clock throughput is higher).
+    """
+    index = {name: i for i, name in enumerate(class_names)}
+    matrix = np.zeros((len(class_names), len(class_names)), dtype=np.int64)
+    seconds = np.zeros(len(class_names))
+    skipped = {'unreadable': 0, 'unknown_label': 0}
+
+    for r in records:
+        if r.get('error'):
+            skipped['unreadable'] += 1
+        elif r['label'] not in index or r['predicted'] not in index:
+            skipped['unknown_label'] += 1
+        else:
+            matrix[index[r['label']], index[r['predicted']]] += 1
+            seconds[index[r['label']]] += r['ms'] / 1000
+
+    support = matrix.sum(axis=1)
+    predicted = matrix.sum(axis=0)
+    correct = np.diag(matrix)
+    per_class = {}
+    for i, name in enumerate(class_names):
+        precision = correct[i] / predicted[i] if predicted[i] else 0.0
+        recall = correct[i] / support[i] if support[i] else 0.0
+        per_class[name] = {
+            'support': int(support[i]),
+            'precision': round(float(precision), 4),
+            'recall': round(float(recall), 4),
+            'f1': round(float(2 * precision * recall / (precision + recall)) if precision + recall else 0.0, 4),
+            'images_per_sec': round(float(support[i] / seconds[i]), 1) if seconds[i] else None,
+        }
+
+    total = int(support.sum())
+    present = [c for c in per_class.values() if c['support']]
+    return {
+        **run_info,
+        'images': total,
+        'skipped': skipped,
+        'accuracy': round(float(correct.sum() / total), 4) if total else None,
+        'macro_precision': round(float(np.mean([c['precision'] for c in present])), 4) if present else None,
+        'macro_recall': round(float(np.mean([c['recall'] for c in present])), 4) if present else None,
+        'images_per_sec': round(float(total / seconds.sum()), 1) if seconds.sum() else None,
+        'per_class': per_class,
+        'classes': list(class_names),
+        'confusion_matrix': matrix.tolist(),
+    }
+
+
+def write_report(report, output):
+    tmp = output + '.json.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp, output + '.json')
+
+
+def print_report(report):
+    print(f"\n{'class':<28} {'support':>8} {'precision':>10} {'recall':>8} {'f1':>6} {'img/s':>8}")
+    for name, c in report['per_class'].items():
+        print(f"{name[:28]:<28} {c['support']:>8} {c['precision']:>10.3f} {c['recall']:>8.3f} "
+              f"{c['f1']:>6.3f} {c['images_per_sec'] or '-':>8}")
+    print(f"\nImages: {report['images']}  accuracy: {report['accuracy']}  "
+          f"images/sec: {report['images_per_sec']}  skipped: {report['skipped']}")
+
+    width = max(2, len(str(max(max(row) for row in report['confusion_matrix'])))) if report['classes'] else 2
+    print("\nConfusion matrix (rows: true class, columns: predicted, in class order above)")
+    for name, row in zip(report['classes'], report['confusion_matrix']):
+        print(f"{name[:28]:<28} " + " ".join(f"{v:>{width}}" for v in row))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Evaluate a model artifact on a labeled dataset")
+    parser.add_argument("--model", default="plant_model.h5")
+    parser.add_argument("--dataset", default="dataset", help="class-folder directory or COCO annotations file")
+    parser.add_argument("--output", default="evaluation", help="writes <output>.json and <output>.predictions.jsonl")
+    parser.add_argument("--mode", choices=("single", "tta"), default=os.environ.get('INFERENCE_MODE', 'single'))
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--label-map", default=None,
+                        help="JSON object renaming dataset labels to model classes, e.g. '{\"blight\": \"Rose Blight\"}'")
+    parser.add_argument("--limit", type=int, default=None, help="stop after this many images in total")
+    parser.add_argument("--restart", action="store_true", help="discard earlier predictions for this output")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = evaluate(args.model, args.dataset, args.output, args.mode, args.batch_size,
+                      json.loads(args.label_map) if args.label_map else None, args.limit, args.restart)
+    print_report(report)
+    print(f"✅ Report saved to {args.output}.json")
@@ -0,0 +1,118 @@
+"""
+Model Export Module - Flower Disease Advisor
+Converts plant_model.h5 into float32/float16/int8 TFLite artifacts
+
+Usage:
+    python export_model.py --model plant_model.h5 --precisions float16 int8
+"""
+
+import argparse
+import os
+import shutil
+
+import tensorflow as tf
+
+import train
+from model_backend import class_names_path
+
+
+PRECISIONS = ("float32", "float16", "int8")
+
+
+# ==================== CALIBRATION ====================
+
+def calibration_dataset(dataset_path, num_samples):
+    """
+    Draw calibration images from the training split used by train.py
+
+    Args:
+        dataset_path (str): Folder with one sub-folder per class
+        num_samples (int): Number of images used to estimate int8 ranges
+
+    Returns:
+        callable: Representative dataset generator for the TFLite converter
+    """
+    train_data, _ = train.load_datasets(dataset_path)
+    samples = train.normalize(train_data).unbatch().take(num_samples).batch(1)
+
+    def representative_dataset():
+        for images, _ in samples:
+            yield [images]
+
+    return representative_dataset
+
+
+# ==================== CONVERSION ====================
+
+def convert(model, precision, representative_dataset=None):
+    """
+    Convert a Keras model to TFLite
+
+    Args:
+        model (tf.keras.Model): Trained float32 model
+        precision (str): One of PRECISIONS
+        representative_dataset (callable): Required for int8
+
+    Returns:
+        bytes: Serialized TFLite flatbuffer
+    """
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+
+    if precision == "float16":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif precision == "int8":
+        if representative_dataset is None:
+            raise ValueError("int8 export needs a calibration dataset")
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+
+    return converter.convert()
+
+
+def export(model_path, precisions, dataset_path, calibration_samples, output_dir=None):
+    """
+    Export every requested precision next to the source model
+
+    Returns:
+        list: Paths of the written .tflite files
+    """
+    model = tf.keras.models.load_model(model_path, compile=False)
+    output_dir = output_dir or os.path.dirname(os.path.abspath(model_path))
+    stem = os.path.splitext(os.path.basename(model_path))[0]
+
+    representative_dataset = None
+    if "int8" in precisions:
+        representative_dataset = calibration_dataset(dataset_path, calibration_samples)
+
+    written = []
+    for precision in precisions:
+        out_path = os.path.join(output_dir, f"{stem}_{precision}.tflite")
+        with open(out_path, "wb") as f:
+            f.write(convert(model, precision, representative_dataset))
+
+        # Each artifact carries its own class list so backends can load it standalone
+        if os.path.exists(class_names_path(model_path)):
+            shutil.copyfile(class_names_path(model_path), class_names_path(out_path))
+
+        print(f"✅ {precision}: {out_path} ({os.path.getsize(out_path) / 1024:.1f} KB)")
+        written.append(out_path)
+    return written
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Export plant_model.h5 to quantized TFLite")
+    parser.add_argument("--model", default=train.MODEL_PATH)
+    parser.add_argument("--dataset", default=train.dataset_path)
+    parser.add_argument("--precisions", nargs="+", choices=PRECISIONS, default=list(PRECISIONS))
+    parser.add_argument("--calibration-samples", type=int, default=200)
+    parser.add_argument("--output-dir", default=None)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    export(args.model, args.precisions, args.dataset, args.calibration_samples, args.output_dir)
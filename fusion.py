@@ -0,0 +1,119 @@
+"""
+Fusion Module - Flower Disease Advisor
+Ranks the disease catalog by combining image probabilities with symptom-text evidence
+"""
+
+from difflib import get_close_matches
+
+import numpy as np
+
+from multilingual import normalize_query
+
+
+# Share of the final score taken by the image model when the description has evidence
+IMAGE_WEIGHT = 0.6
+
+
+class FusionRanker:
+    """
+    Scores every catalog disease in one vectorized pass
+
+    The keyword table is compiled into a (keywords x diseases) matrix once, so
+    scoring a description is a presence vector times that matrix, and fusing
+    it with the image is a weighted sum of two catalog-length vectors.
+    """
+
+    def __init__(self, disease_db, symptom_keywords, image_weight=IMAGE_WEIGHT):
+        self.disease_db = disease_db
+        self.names = list(disease_db)
+        self.image_weight = image_weight
+        self._index = {name: i for i, name in enumerate(self.names)}
+        self.keywords = list(symptom_keywords)
+
+        self._keyword_matrix = np.zeros((len(self.keywords), len(self.names)), dtype=np.float32)
+        for row, diseases in enumerate(symptom_keywords.values()):
+            for disease in diseases:
+                self._keyword_matrix[row, self._index[disease]] = 1.0
+
+    # ---------- evidence vectors ----------
+
+    def text_scores(self, text):
+        """
+        Share of matched keywords pointing at each disease
+
+        Falls back to fuzzy disease-name matching like find_disease_by_symptoms.
+
+        Returns:
+            np.ndarray: Catalog-length vector summing to 1, or all zeros without evidence
+        """
+        text = (text or '').strip()
+        scores = np.zeros(len(self.names), dtype=np.float32)
+        if not text:
+            return scores
+        _, text = normalize_query(text)
+
+        hits = np.fromiter((keyword in text for keyword in self.keywords),
+                           dtype=np.float32, count=len(self.keywords))
+        if hits.any():
+            scores = hits @ self._keyword_matrix
+        else:
+            for name in get_close_matches(text, self.names, n=2, cutoff=0.6):
+                scores[self._index[name]] = 1.0
+
+        total = scores.sum()
+        return scores / total if total else scores
+
+    def image_scores(self, disease_name, prediction=None):
+        """
+        Image evidence as a catalog-length probability vector
+
+        Args:
+            disease_name (str): Class picked by the image classifier
+            prediction (dict): Calibrated {'probs': {class: p}} if a model produced it;
+                               without one the pick is taken as certain
+
+        Returns:
+            np.ndarray: Catalog-length vector
+        """
+        scores = np.zeros(len(self.names), dtype=np.float32)
+        if prediction is None or not prediction.get('probs'):
+            scores[self._index[disease_name]] = 1.0
+            return scores
+
+        for name, p in prediction['probs'].items():
+            if name in self._index:
+                scores[self._index[name]] = p
+        return scores
+
+    # ---------- ranking ----------
+
+    def rank(self, disease_name, prediction=None, description='', text=None, limit=3):
+        """
+        Fuse both signals into one ranked list
+
+        Args:
+            text (np.ndarray): Precomputed text_scores(description), when several
+                               images share one description
+
+        Returns:
+            list: [{'name', 'score', 'image_score', 'text_score'}, ...], best first
+        """
+        image = self.image_scores(disease_name, prediction)
+        if text is None:
+            text = self.text_scores(description)
+
+        if text.any():
+            fused = self.image_weight * image + (1.0 - self.image_weight) * text
+        else:
+            fused = image
+
+        order = np.argsort(-fused, kind='stable')[:limit]
+        return [
+            {
+                'name': self.names[i],
+                'score': round(float(fused[i]), 4),
+                'image_score': round(float(image[i]), 4),
+                'text_score': round(float(text[i]), 4),
+            }
+            for i in order if fused[i] > 0
+        ]
@@ -0,0 +1,56 @@
+"""
+Gunicorn Configuration - Flower Disease Advisor
+Preforked workers sharing the preloaded knowledge base and model
+
+Usage:
+    gunicorn -c gunicorn.conf.py wsgi:app
+    WEB_WORKERS=8 WEB_THREADS=4 MODEL_PATH=plant_model_int8.tflite gunicorn -c gunicorn.conf.py wsgi:app
+
+Reloading:
+    kill -HUP <master pid>     restart workers gracefully (same preloaded code and model)
+    kill -USR2 <master pid>    start a new master with new code, then
+    kill -WINCH <old master>   retire the old workers and
+    kill -QUIT <old master>    stop the old master (zero-downtime upgrade)
+
+Metrics (/metrics) and profiles are kept per worker process.
+"""
+
+import multiprocessing
+import os
+
+
+bind = os.environ.get('BIND', '0.0.0.0:5000')
+
+# Inference is CPU-bound: one process per core. Threads cover requests that wait on
+# I/O (uploads, SQLite, streaming responses) without another copy of the app.
+workers = int(os.environ.get('WEB_WORKERS', '0')) or multiprocessing.cpu_count()
+threads = int(os.environ.get('WEB_THREADS', '4'))
+worker_class = 'gthread'
+
+# Import app (and with it the knowledge base) once in the master; workers share it copy-on-write
+preload_app = True
+
+timeout = 120            # large uploads with TTA inference on a busy core
+graceful_timeout = 30    # in-flight requests finish before a worker is replaced
+keepalive = 5
+
+# Recycle workers now and then to bound memory growth; jitter avoids restarting all at once
+max_requests = 2000
+max_requests_jitter = 200
+
+accesslog = '-'
+errorlog = '-'
+
+
+def on_starting(server):
+    """Load shared state in the master before any worker is forked"""
+    from app import prewarm
+    timings = prewarm(before_fork=True)
+    server.log.info("Prewarmed master: %s", {k: round(v, 3) for k, v in timings.items()})
+
+
+def post_fork(server, worker):
+    """Finish loading in the worker (model if not fork-safe, warm-up inference)"""
+    from app import prewarm
+    timings = prewarm()
+    server.log.info("Worker %s prewarmed: %s", worker.pid, {k: round(v, 3) for k, v in timings.items()})
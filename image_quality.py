@@ -0,0 +1,117 @@
+"""
+Image Quality Module - Flower Disease Advisor
+Cheap pre-inference checks for blur, exposure, resolution and blank images
+
+All checks run on one grayscale copy downscaled to ANALYSIS_SIZE, so the cost
+is independent of the upload's resolution and the blur score is comparable
+across photos.
+"""
+
+import os
+import time
+
+import numpy as np
+
+from lazy_imports import lazy_import
+
+cv2 = lazy_import('cv2')
+
+
+# 'reject' blocks hard failures, 'flag' only reports them, 'off' skips the checks
+QUALITY_GATE = os.environ.get('QUALITY_GATE', 'reject')
+
+ANALYSIS_SIZE = 256          # longest side of the analysed copy
+MIN_SIDE = 96                # smaller originals cannot fill the model input
+BLUR_THRESHOLD = 60.0        # Laplacian variance below this looks out of focus
+UNIFORM_STD = 6.0            # gray-level std below this is a blank/covered frame
+DARK_LEVEL, BRIGHT_LEVEL = 20, 235
+DARK_MEAN, BRIGHT_MEAN = 35.0, 225.0
+CLIPPED_FRACTION = 0.5       # share of pixels crushed to black/white
+
+# Issues that make a prediction meaningless; the rest are reported as warnings
+BLOCKING_ISSUES = {'too_small', 'uniform', 'too_dark', 'overexposed'}
+
+MESSAGES = {
+    'too_small': "Image resolution is too low",
+    'uniform': "Image looks blank or covered",
+    'too_dark': "Image is too dark",
+    'overexposed': "Image is overexposed",
+    'blurry': "Image looks blurry",
+    'underexposed': "Image is a bit dark",
+    'bright': "Image is very bright",
+}
+
+
+def assess_quality(img_bgr):
+    """
+    Score one decoded image
+
+    Args:
+        img_bgr (np.ndarray): Image as returned by cv2.imread
+
+    Returns:
+        dict: {'ok', 'issues', 'message', 'scores', 'ms'}; ok is False only for
+              blocking issues with QUALITY_GATE='reject'
+    """
+    if QUALITY_GATE == 'off':
+        return {'ok': True, 'issues': [], 'message': None, 'scores': {}, 'ms': 0.0}
+
+    start = time.perf_counter()
+    h, w = img_bgr.shape[:2]
+    scale = min(1.0, ANALYSIS_SIZE / max(h, w))
+    small = img_bgr if scale == 1.0 else cv2.resize(
+        img_bgr, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+
+    hist = np.bincount(gray.ravel(), minlength=256)
+    total = hist.sum()
+    levels = np.arange(256)
+    mean = float(hist @ levels / total)
+    std = float(np.sqrt(hist @ (levels - mean) ** 2 / total))
+    dark = float(hist[:DARK_LEVEL].sum() / total)
+    bright = float(hist[BRIGHT_LEVEL:].sum() / total)
+    sharpness = float(cv2.Laplacian(gray, cv2.CV_32F).var())
+
+    issues = []
+    if min(h, w) < MIN_SIDE:
+        issues.append('too_small')
+    if std < UNIFORM_STD:
+        issues.append('uniform')
+    elif mean < DARK_MEAN or dark > CLIPPED_FRACTION:
+        issues.append('too_dark' if mean < DARK_MEAN / 2 else 'underexposed')
+    elif mean > BRIGHT_MEAN or bright > CLIPPED_FRACTION:
+        issues.append('overexposed' if mean > (BRIGHT_MEAN + 255) / 2 else 'bright')
+    if 'uniform' not in issues and sharpness < BLUR_THRESHOLD:
+        issues.append('blurry')
+
+    blocking = [i for i in issues if i in BLOCKING_ISSUES]
+    return {
+        'ok': not (blocking and QUALITY_GATE == 'reject'),
+        'issues': issues,
+        'message': '; '.join(MESSAGES[i] for i in issues) or None,
+        'scores': {
+            'width': int(w),
+            'height': int(h),
+            'sharpness': round(sharpness, 1),
+            'brightness': round(mean, 1),
+            'contrast': round(std, 1),
+            'dark_fraction': round(dark, 3),
+            'bright_fraction': round(bright, 3),
+        },
+        'ms': round((time.perf_counter() - start) * 1000, 3),
+    }
+
+
+if __name__ == "__main__":
+    """Check the sample photos and time the checks (compare with model latency from benchmark_model.py)"""
+    import glob
+
+    runs = 50
+    for path in sorted(glob.glob("*.[jJ][pP][gG]")):
+        img = cv2.imread(path)
+        assess_quality(img)
+        start = time.perf_counter()
+        for _ in range(runs):
+            result = assess_quality(img)
+        ms = (time.perf_counter() - start) / runs * 1000
+        print(f"{ms:6.2f} ms  {img.shape[1]}x{img.shape[0]}  {result['issues'] or 'ok'}  {path[:40]}")
@@ -0,0 +1,222 @@
+"""
+Jobs Module - Flower Disease Advisor
+SQLite-backed job queue that runs image analysis in a local process pool
+"""
+
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+
+JOBS_DB = os.environ.get('JOBS_DB', 'jobs.sqlite3')
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', '0')) or os.cpu_count() or 2
+MAX_PENDING_JOBS = int(os.environ.get('MAX_PENDING_JOBS', '0')) or 4 * JOB_WORKERS
+JOB_RETENTION_SECONDS = 24 * 60 * 60
+STALE_JOB_SECONDS = 10 * 60  # queued or running this long = lost in a crash/restart
+CLEANUP_INTERVAL_SECONDS = 60
+
+# Terminal states; anything else is still in flight
+FINISHED_STATES = ('done', 'failed')
+
+
+class QueueFull(Exception):
+    """MAX_PENDING_JOBS jobs are already queued or running in this process"""
+
+
+def _run_job(db_path, job_id, worker_fn, *args):
+    """Pool-process entry point: mark the job running, then do the work"""
+    with sqlite3.connect(db_path, timeout=10) as conn:
+        conn.execute("UPDATE jobs SET status = 'running', started = ? WHERE id = ? AND status = 'queued'",
+                     (time.time(), job_id))
+    return worker_fn(*args)
+
+
+# ==================== JOB QUEUE ====================
+
+class JobQueue:
+    """
+    Durable job records in SQLite, work executed in a ProcessPoolExecutor
+
+    Running analysis in separate processes keeps decode and inference from
+    holding the web worker's GIL. The pool is created on first use so a
+    preforking server never forks with live pool processes, and its
+    processes are spawned rather than forked: by then the web worker has
+    request threads and possibly a loaded model whose locks a fork would copy.
+    At most `max_pending` jobs may be unfinished at once.
+
+    Jobs go queued -> running -> done/failed. Jobs stuck in queued or running
+    for STALE_JOB_SECONDS (their web or pool process died) are failed by the
+    periodic cleanup, so pollers and event streams always see an end.
+    """
+
+    def __init__(self, worker_fn, db_path=JOBS_DB, max_workers=JOB_WORKERS, max_pending=MAX_PENDING_JOBS):
+        self.worker_fn = worker_fn
+        self.db_path = db_path
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._changed = threading.Condition()
+        self._last_cleanup = 0.0
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id TEXT PRIMARY KEY, status TEXT NOT NULL, created REAL NOT NULL,"
+                " started REAL, finished REAL, result TEXT, error TEXT)"
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if 'started' not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN started REAL")
+        self.reap_stale()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def _get_pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+            return self._pool
+
+    # ---------- submission ----------
+
+    def submit(self, *args):
+        """
+        Queue one call of worker_fn(*args)
+
+        Returns:
+            str: Job id
+
+        Raises:
+            QueueFull: If max_pending jobs are already unfinished
+        """
+        with self._pool_lock:
+            if self.pending >= self.max_pending:
+                raise QueueFull(f"{self.pending} jobs pending")
+            self.pending += 1
+
+        job_id = uuid.uuid4().hex
+        try:
+            with self._connect() as conn:
+                conn.execute("INSERT INTO jobs (id, status, created) VALUES (?, 'queued', ?)",
+                             (job_id, time.time()))
+            future = self._get_pool().submit(_run_job, self.db_path, job_id, self.worker_fn, *args)
+        except BaseException:
+            with self._pool_lock:
+                self.pending -= 1
+            raise
+        future.add_done_callback(lambda f: self._finish(job_id, f))
+        self._maybe_cleanup()
+        return job_id
+
+    def _finish(self, job_id, future):
+        """Persist the outcome of a finished future and wake waiters"""
+        with self._pool_lock:
+            self.pending -= 1
+        error = future.exception()
+        with self._connect() as conn:
+            if error is None:
+                conn.execute(
+                    "UPDATE jobs SET status = 'done', result = ?, finished = ? WHERE id = ?",
+                    (json.dumps(future.result()), time.time(), job_id)
+                )
+            else:
+                conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = ?, finished = ? WHERE id = ?",
+                    (str(error), time.time(), job_id)
+                )
+        with self._changed:
+            self._changed.notify_all()
+
+    # ---------- queries ----------
+
+    def get(self, job_id):
+        """
+        Look up a job
+
+        Returns:
+            dict: Job state, or None if unknown
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id, status, created, started, finished, result, error FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            'job_id': row[0],
+            'status': row[1],
+            'created': row[2],
+            'started': row[3],
+            'finished': row[4],
+            'result': json.loads(row[5]) if row[5] else None,
+            'error': row[6],
+        }
+
+    def wait(self, job_id, timeout):
+        """
+        Block until the job finishes or `timeout` seconds pass
+
+        Returns:
+            dict: Latest job state
+        """
+        deadline = time.monotonic() + timeout
+        job = self.get(job_id)
+        while job is not None and job['status'] not in FINISHED_STATES:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            with self._changed:
+                # Re-check periodically: another web process may own the job
+                self._changed.wait(min(remaining, 1.0))
+            self._maybe_cleanup()
+            job = self.get(job_id)
+        return job
+
+    # ---------- cleanup ----------
+
+    def _maybe_cleanup(self):
+        """Run purge() at most every CLEANUP_INTERVAL_SECONDS"""
+        now = time.monotonic()
+        if now - self._last_cleanup >= CLEANUP_INTERVAL_SECONDS:
+            self._last_cleanup = now
+            self.purge()
+
+    def reap_stale(self, stale_after=STALE_JOB_SECONDS):
+        """Fail jobs queued or running for longer than `stale_after` seconds"""
+        now = time.time()
+        with self._connect() as conn:
+            reaped = conn.execute(
+                "UPDATE jobs SET status = 'failed', error = 'Job lost (worker crashed or restarted)', finished = ?"
+                " WHERE (status = 'queued' AND created < ?) OR (status = 'running' AND started < ?)",
+                (now, now - stale_after, now - stale_after)
+            ).rowcount
+        if reaped:
+            with self._changed:
+                self._changed.notify_all()
+        return reaped
+
+    def purge(self, older_than=JOB_RETENTION_SECONDS):
+        """Fail stale jobs and delete finished jobs older than `older_than` seconds"""
+        self.reap_stale()
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished < ?",
+                (time.time() - older_than,)
+            )
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+                self._pool = None
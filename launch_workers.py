@@ -0,0 +1,130 @@
+"""
+Multi-Worker Launcher Module - Flower Disease Advisor
+Runs train.py as several local MultiWorkerMirroredStrategy workers and reports scaling
+
+Usage:
+    python launch_workers.py --workers 1 2 4 -- --epochs 1 --arch gap
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+
+
+# ==================== CLUSTER SETUP ====================
+
+def free_ports(count):
+    """Reserve `count` free localhost ports"""
+    sockets = []
+    for _ in range(count):
+        s = socket.socket()
+        s.bind(("localhost", 0))
+        sockets.append(s)
+    ports = [s.getsockname()[1] for s in sockets]
+    for s in sockets:
+        s.close()
+    return ports
+
+
+def run_workers(num_workers, train_args, work_dir):
+    """
+    Start one train.py process per worker and wait for all of them
+
+    Args:
+        num_workers (int): Number of local worker processes
+        train_args (list): Extra arguments passed to every train.py
+        work_dir (str): Directory for the step log and per-run outputs
+
+    Returns:
+        dict: The chief's step-time record
+    """
+    cluster = {"worker": [f"localhost:{port}" for port in free_ports(num_workers)]}
+    step_log = os.path.join(work_dir, f"steps_{num_workers}.jsonl")
+    threads = max(1, (os.cpu_count() or 1) // num_workers)
+
+    processes = []
+    for index in range(num_workers):
+        cmd = [
+            sys.executable, "train.py",
+            "--cluster-spec", json.dumps(cluster),
+            "--worker-index", str(index),
+            "--intra-op-threads", str(threads),
+            "--step-log", step_log,
+            "--checkpoint-dir", os.path.join(work_dir, f"checkpoints_{num_workers}"),
+            "--output", os.path.join(work_dir, f"model_{num_workers}.h5"),
+            *train_args,
+        ]
+        processes.append(subprocess.Popen(cmd))
+
+    codes = [p.wait() for p in processes]
+    if any(codes):
+        raise RuntimeError(f"{num_workers}-worker run failed with exit codes {codes}")
+
+    with open(step_log) as f:
+        records = [json.loads(line) for line in f]
+    return next(r for r in records if r['worker_index'] == 0)
+
+
+# ==================== SCALING REPORT ====================
+
+def scaling_report(records):
+    """
+    Throughput and efficiency relative to the smallest worker count
+
+    A run that logged no steps past skip_steps has no step_p50_ms; its row
+    reports None instead of losing the whole report.
+
+    Returns:
+        list: One row per worker count
+    """
+    rows = []
+    for record in records:
+        step_ms = record.get('step_p50_ms')
+        if step_ms is None:
+            print(f"⚠️ {record['workers']}-worker run logged no timed steps (the first few are skipped); train for more steps")
+        rows.append({
+            'workers': record['workers'],
+            'global_batch_size': record['global_batch_size'],
+            'step_p50_ms': step_ms,
+            'images_per_sec': round(record['global_batch_size'] / (step_ms / 1000), 1) if step_ms else None,
+        })
+
+    base = next((row for row in rows if row['images_per_sec']), None)
+    for row in rows:
+        if base is None or row['images_per_sec'] is None:
+            row['scaling_efficiency'] = None
+            continue
+        ideal = base['images_per_sec'] * row['workers'] / base['workers']
+        row['scaling_efficiency'] = round(row['images_per_sec'] / ideal, 3)
+    return rows
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Launch local multi-worker training runs")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--output", default="scaling_report.json")
+    parser.add_argument("train_args", nargs=argparse.REMAINDER,
+                        help="arguments after -- are passed to train.py")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    train_args = [a for a in args.train_args if a != "--"]
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        records = [run_workers(n, train_args, work_dir) for n in sorted(args.workers)]
+
+    rows = scaling_report(records)
+    print(f"{'workers':>8}{'batch':>8}{'step ms':>10}{'img/s':>10}{'efficiency':>12}")
+    for row in rows:
+        print(f"{row['workers']:>8}{row['global_batch_size']:>8}{row['step_p50_ms'] or '-':>10}"
+              f"{row['images_per_sec'] or '-':>10}{row['scaling_efficiency'] or '-':>12}")
+
+    with open(args.output, "w") as f:
+        json.dump(rows, f, indent=2)
+    print(f"\n📄 Report written to {args.output}")
@@ -0,0 +1,45 @@
+"""
+Lazy Imports Module - Flower Disease Advisor
+Defers heavy imports (OpenCV, TensorFlow) until first use
+"""
+
+import importlib
+import threading
+
+
+class LazyModule:
+    """
+    Stand-in for a module that is imported on first attribute access
+
+    `cv2 = lazy_import('cv2')` keeps call sites unchanged (`cv2.imread(...)`)
+    while routes that never touch images never pay for the import.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Import now (used by prewarm hooks); returns the real module"""
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+    def __repr__(self):
+        state = 'loaded' if self.loaded else 'not loaded'
+        return f"<lazy module '{self._name}' ({state})>"
+
+
+def lazy_import(name):
+    """Module proxy that imports `name` on first use"""
+    return LazyModule(name)
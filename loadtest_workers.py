@@ -0,0 +1,123 @@
+"""
+Worker Scaling Load Test - Flower Disease Advisor
+Starts gunicorn with gunicorn.conf.py at several worker counts and drives each
+with the benchmark_api.py workload to show multi-core scaling
+
+Usage:
+    python loadtest_workers.py --workers 1 2 4 --duration 20 --concurrency 16
+    MODEL_PATH=plant_model_int8.tflite python loadtest_workers.py --workers 1 2 4 8 --mix upload=1
+"""
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from benchmark_api import DEFAULT_MIX, HttpDriver, load_sample_images, parse_mix, run_benchmark
+from launch_workers import free_ports
+
+
+# ==================== SERVER ====================
+
+def start_gunicorn(num_workers, threads, port):
+    """Launch gunicorn with the production config and a fixed worker count"""
+    # All load comes from loopback; exempt it from per-user rate limits unless told otherwise
+    env = dict(os.environ, WEB_WORKERS=str(num_workers), WEB_THREADS=str(threads),
+               BIND=f"127.0.0.1:{port}",
+               ADMISSION_EXEMPT_LOOPBACK=os.environ.get('ADMISSION_EXEMPT_LOOPBACK', '1'))
+    return subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--access-logfile", "/dev/null", "wsgi:app"],
+        env=env,
+    )
+
+
+def wait_until_ready(url, process, timeout=120):
+    """Poll until every worker could be serving (the master answers once the first is up)"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"gunicorn exited with code {process.returncode}")
+        try:
+            with urllib.request.urlopen(f"{url}/api/stats", timeout=2):
+                return
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.25)
+    raise SystemExit(f"gunicorn did not become ready within {timeout}s")
+
+
+def stop_gunicorn(process):
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=60)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+# ==================== LOAD TEST ====================
+
+def run(worker_counts, threads, mix, duration, concurrency, warmup, seed):
+    """
+    Benchmark each worker count in turn
+
+    Returns:
+        list: One benchmark_api result per worker count, with speedup and efficiency
+    """
+    images = load_sample_images()
+    ops = parse_mix(mix)
+    results = []
+
+    for num_workers in worker_counts:
+        port = free_ports(1)[0]
+        url = f"http://127.0.0.1:{port}"
+        process = start_gunicorn(num_workers, threads, port)
+        try:
+            wait_until_ready(url, process)
+            driver = HttpDriver(url)
+            # Let every worker serve (and warm) before measuring
+            run_benchmark(driver, ops, images, None, warmup, concurrency, seed)
+            result = run_benchmark(driver, ops, images, None, duration, concurrency, seed)
+        finally:
+            stop_gunicorn(process)
+
+        result.update({'workers': num_workers, 'threads': threads})
+        results.append(result)
+        print(f"{num_workers} workers: {result['throughput_rps']} req/s, p95 {result['latency']['p95_ms']} ms")
+
+    base = results[0]['throughput_rps'] / results[0]['workers']
+    for result in results:
+        result['speedup'] = round(result['throughput_rps'] / results[0]['throughput_rps'], 2)
+        result['efficiency'] = round(result['throughput_rps'] / (base * result['workers']), 2)
+    return results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Measure throughput scaling across gunicorn worker counts")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--warmup", type=float, default=3)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    print(f"CPU cores: {os.cpu_count()}, model: {os.environ.get('MODEL_PATH') or 'demo mode'}")
+    results = run(args.workers, args.threads, args.mix, args.duration, args.concurrency, args.warmup, args.seed)
+
+    print(f"\n{'workers':>7} {'req/s':>9} {'p95 ms':>9} {'speedup':>8} {'efficiency':>10}")
+    for r in results:
+        print(f"{r['workers']:>7} {r['throughput_rps']:>9} {r['latency']['p95_ms']:>9} "
+              f"{r['speedup']:>8} {r['efficiency']:>10}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
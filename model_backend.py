@@ -0,0 +1,347 @@
+"""
+Model Backend Module - Flower Disease Advisor
+Loads trained classifiers (Keras .h5 or quantized .tflite) behind one predict API
+"""
+
+import json
+import os
+import threading
+
+import numpy as np
+
+from lazy_imports import lazy_import
+
+cv2 = lazy_import('cv2')
+
+
+IMAGE_SIZE = (128, 128)
+
+# Test-time augmentation resizes a little larger so crops keep most of the frame
+TTA_CROP_MARGIN = 1.15
+
+
+# ==================== PREPROCESSING ====================
+
+def preprocess_image(img_bgr, image_size=IMAGE_SIZE):
+    """
+    Convert an OpenCV BGR image into the model's input layout
+
+    Args:
+        img_bgr (np.ndarray): Image as returned by cv2.imread
+        image_size (tuple): Target (height, width)
+
+    Returns:
+        np.ndarray: float32 RGB array scaled to [0, 1]
+    """
+    img_rgb = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2RGB)
+    img_resized = cv2.resize(img_rgb, (image_size[1], image_size[0]), interpolation=cv2.INTER_LINEAR)
+    return img_resized.astype(np.float32) / 255.0
+
+
+def tta_views(img_bgr, image_size=IMAGE_SIZE):
+    """
+    Build the test-time augmentation views of one image as a single tensor
+
+    Views: full frame, horizontal flip, vertical flip, center crop and the
+    four corner crops of a slightly enlarged copy.
+
+    Returns:
+        np.ndarray: float32 array of shape (8, h, w, 3)
+    """
+    h, w = image_size
+    full = preprocess_image(img_bgr, image_size)
+    big = preprocess_image(img_bgr, (int(h * TTA_CROP_MARGIN), int(w * TTA_CROP_MARGIN)))
+    bh, bw = big.shape[:2]
+    top, left = (bh - h) // 2, (bw - w) // 2
+
+    return np.stack([
+        full,
+        full[:, ::-1],
+        full[::-1, :],
+        big[top:top + h, left:left + w],
+        big[:h, :w],
+        big[:h, bw - w:],
+        big[bh - h:, :w],
+        big[bh - h:, bw - w:],
+    ])
+
+
+def class_names_path(model_path):
+    """Path of the class list stored next to a model artifact"""
+    return os.path.splitext(model_path)[0] + ".classes.json"
+
+
+def load_class_names(model_path):
+    """
+    Load the class order written by train.py / export_model.py
+
+    Args:
+        model_path (str): Path to the model artifact
+
+    Returns:
+        list: Class names, or an empty list if no class file exists
+    """
+    path = class_names_path(model_path)
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+
+# ==================== BACKENDS ====================
+
+class KerasBackend:
+    """float32 Keras model saved by train.py"""
+
+    def __init__(self, model_path):
+        import tensorflow as tf
+
+        self.path = model_path
+        self.precision = "float32"
+        self.model = tf.keras.models.load_model(model_path, compile=False)
+        self.input_size = tuple(self.model.input_shape[1:3])
+        self.class_names = load_class_names(model_path)
+
+    def predict(self, batch):
+        """
+        Run inference on a batch
+
+        Args:
+            batch (np.ndarray): float32 array of shape (n, h, w, 3)
+
+        Returns:
+            np.ndarray: Class probabilities of shape (n, classes)
+        """
+        return np.asarray(self.model.predict_on_batch(batch), dtype=np.float32)
+
+
+class TFLiteBackend:
+    """
+    float32/float16/int8 TFLite model written by export_model.py
+
+    The interpreter is not thread-safe, so predict() is serialized with a
+    lock; run more worker processes (not threads) to use more cores.
+    """
+
+    def __init__(self, model_path, num_threads=None):
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+
+        self.path = model_path
+        self.interpreter = Interpreter(model_path=model_path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._batch_size = int(self._input['shape'][0])
+        self.input_size = tuple(int(d) for d in self._input['shape'][1:3])
+        self.precision = _tflite_precision(self.interpreter, self._input)
+        self.class_names = load_class_names(model_path)
+        self._lock = threading.Lock()
+
+    def _resize(self, batch_size):
+        """Resize the input tensor when the batch size changes"""
+        if batch_size != self._batch_size:
+            self.interpreter.resize_tensor_input(
+                self._input['index'], [batch_size, *self.input_size, 3]
+            )
+            self.interpreter.allocate_tensors()
+            self._input = self.interpreter.get_input_details()[0]
+            self._output = self.interpreter.get_output_details()[0]
+            self._batch_size = batch_size
+
+    def predict(self, batch):
+        """
+        Run inference on a batch
+
+        Args:
+            batch (np.ndarray): float32 array of shape (n, h, w, 3)
+
+        Returns:
+            np.ndarray: Class probabilities of shape (n, classes)
+        """
+        batch = np.asarray(batch, dtype=np.float32)
+        with self._lock:
+            self._resize(batch.shape[0])
+
+            if self._input['dtype'] == np.int8:
+                scale, zero_point = self._input['quantization']
+                batch = np.clip(np.round(batch / scale + zero_point), -128, 127).astype(np.int8)
+
+            self.interpreter.set_tensor(self._input['index'], batch)
+            self.interpreter.invoke()
+            output = self.interpreter.get_tensor(self._output['index'])
+
+        if self._output['dtype'] == np.int8:
+            scale, zero_point = self._output['quantization']
+            output = (output.astype(np.float32) - zero_point) * scale
+        return output.astype(np.float32)
+
+
+def _tflite_precision(interpreter, input_details):
+    """Describe the weight precision of a TFLite model"""
+    if input_details['dtype'] == np.int8:
+        return "int8"
+    if any(t['dtype'] == np.float16 for t in interpreter.get_tensor_details()):
+        return "float16"
+    return "float32"
+
+
+# ==================== CALIBRATION ====================
+
+def calibration_path(model_path):
+    """Path of the temperature file stored next to a model artifact"""
+    return os.path.splitext(model_path)[0] + ".calibration.json"
+
+
+def load_temperature(model_path, mode='single'):
+    """
+    Fitted softmax temperature for an inference mode ('single' or 'tta')
+
+    Returns:
+        float: 1.0 (uncalibrated) if none was fitted for that mode
+    """
+    path = calibration_path(model_path)
+    if not os.path.exists(path):
+        return 1.0
+    with open(path) as f:
+        report = json.load(f)
+    if mode == 'single':
+        return float(report['temperature'])
+    return float(report.get('temperatures', {}).get(mode, 1.0))
+
+
+def apply_temperature(probs, temperature):
+    """
+    Rescale softmax outputs as if the logits were divided by `temperature`
+
+    Args:
+        probs (np.ndarray): Probabilities of shape (..., classes)
+        temperature (float): > 1 softens, < 1 sharpens
+
+    Returns:
+        np.ndarray: Calibrated probabilities
+    """
+    logits = np.log(np.clip(probs, 1e-12, 1.0)) / temperature
+    logits -= logits.max(axis=-1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+def negative_log_likelihood(probs, labels):
+    """Mean NLL of the true labels"""
+    return float(-np.mean(np.log(np.clip(probs[np.arange(len(labels)), labels], 1e-12, 1.0))))
+
+
+def fit_temperature(probs, labels, low=0.05, high=10.0):
+    """
+    Find the temperature minimizing validation NLL
+
+    Coarse log-spaced grid, then golden-section refinement around the best point.
+
+    Args:
+        probs (np.ndarray): Uncalibrated validation probabilities (n, classes), or
+            (n, views, classes) to fit the temperature applied per view before
+            averaging, as predict_tta does
+        labels (np.ndarray): True class indices (n,)
+
+    Returns:
+        float: Fitted temperature
+    """
+    def loss(t):
+        calibrated = apply_temperature(probs, t)
+        if calibrated.ndim == 3:
+            calibrated = calibrated.mean(axis=1)
+        return negative_log_likelihood(calibrated, labels)
+
+    grid = np.exp(np.linspace(np.log(low), np.log(high), 50))
+    best = int(np.argmin([loss(t) for t in grid]))
+    a, b = grid[max(best - 1, 0)], grid[min(best + 1, len(grid) - 1)]
+
+    ratio = (np.sqrt(5) - 1) / 2
+    for _ in range(40):
+        c, d = b - ratio * (b - a), a + ratio * (b - a)
+        if loss(c) < loss(d):
+            b = d
+        else:
+            a = c
+    return float((a + b) / 2)
+
+
+# ==================== LOADING ====================
+
+def load_backend(model_path, num_threads=None):
+    """
+    Load a model artifact with the matching backend
+
+    Args:
+        model_path (str): Path to a .h5/.keras or .tflite file
+        num_threads (int): CPU threads for the TFLite interpreter
+
+    Returns:
+        KerasBackend or TFLiteBackend
+    """
+    ext = os.path.splitext(model_path)[1].lower()
+    if ext == ".tflite":
+        backend = TFLiteBackend(model_path, num_threads=num_threads)
+    elif ext in (".h5", ".keras"):
+        backend = KerasBackend(model_path)
+    else:
+        raise ValueError(f"Unsupported model format: {model_path}")
+
+    backend.temperature = load_temperature(model_path)
+    # Averaging augmented views already softens the output, so TTA has its own fit
+    backend.tta_temperature = load_temperature(model_path, 'tta')
+    return backend
+
+
+def predict_top(backend, img_bgr):
+    """
+    Predict a single image and return the best class
+
+    Args:
+        backend: Loaded backend
+        img_bgr (np.ndarray): Image as returned by cv2.imread
+
+    Returns:
+        tuple: (class_name, probability, probabilities)
+    """
+    batch = preprocess_image(img_bgr, backend.input_size)[np.newaxis]
+    probs = backend.predict(batch)[0]
+    idx = int(np.argmax(probs))
+    name = backend.class_names[idx] if idx < len(backend.class_names) else str(idx)
+    return name, float(probs[idx]), probs
+
+
+def predict_tta(backend, images, top_k=3):
+    """
+    Calibrated test-time-augmented prediction for a list of images
+
+    All views of all images go through the model in one batch, so the cost
+    is one larger forward pass rather than one pass per view.
+
+    Args:
+        backend: Loaded backend (uses backend.tta_temperature)
+        images (list): Images as returned by cv2.imread
+        top_k (int): Number of ranked classes to return
+
+    Returns:
+        tuple: (averaged calibrated probabilities (n, classes), top-k list per image)
+    """
+    views = [tta_views(img, backend.input_size) for img in images]
+    per_image = len(views[0])
+    probs = backend.predict(np.concatenate(views))
+    probs = apply_temperature(probs, getattr(backend, 'tta_temperature', 1.0))
+    probs = probs.reshape(len(images), per_image, -1).mean(axis=1)
+    return probs, [top_classes(p, backend.class_names, top_k) for p in probs]
+
+
+def top_classes(probs, class_names, k):
+    """Highest-probability classes as [{'name', 'confidence'}, ...]"""
+    order = np.argsort(probs)[::-1][:k]
+    return [
+        {'name': class_names[i] if i < len(class_names) else str(i), 'confidence': round(float(probs[i]), 4)}
+        for i in order
+    ]
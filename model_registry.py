@@ -0,0 +1,236 @@
+"""
+Model Registry Module - Flower Disease Advisor
+Versioned model artifacts with metadata, and aliases such as 'production'/'candidate'
+
+Layout:
+    models/<name>/aliases.json                {"production": "v3", "candidate": "v4"}
+    models/<name>/v3/model.tflite             the artifact, with its sibling files
+    models/<name>/v3/model.classes.json
+    models/<name>/v3/model.calibration.json   (if calibrated)
+    models/<name>/v3/metadata.json
+
+Usage:
+    python model_registry.py register plant_model_int8.tflite --metrics '{"val_accuracy": 0.91}'
+    python model_registry.py list
+    python model_registry.py alias candidate v4
+    python model_registry.py verify production
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+
+from model_backend import calibration_path, class_names_path, load_class_names
+
+
+REGISTRY_DIR = os.environ.get('MODEL_REGISTRY', 'models')
+DEFAULT_NAME = 'plant'
+METADATA_FILE = 'metadata.json'
+ALIASES_FILE = 'aliases.json'
+
+
+def sha256_file(path):
+    """Hex SHA-256 of a file, read in 1 MB chunks"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_json(path, data):
+    """Write through a temp file so readers never see a partial file"""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+def _model_dir(name, root):
+    return os.path.join(root, name)
+
+
+def _version_number(version):
+    return int(version[1:]) if version[:1] == 'v' and version[1:].isdigit() else -1
+
+
+# ==================== REGISTERING ====================
+
+def register(artifact_path, name=DEFAULT_NAME, metrics=None, input_size=None, extra=None, root=REGISTRY_DIR):
+    """
+    Copy a model artifact into the next free version of `name`
+
+    The class list and calibration file stored next to the artifact are
+    copied with it, so the registered version loads exactly like the original.
+
+    Args:
+        artifact_path (str): .h5/.keras/.tflite file
+        name (str): Registered model name
+        metrics (dict): Evaluation results, e.g. {'val_accuracy': 0.91}
+        input_size (tuple): (height, width); read by loading the model if None
+        extra (dict): Any other metadata (architecture, training settings, ...)
+
+    Returns:
+        dict: Metadata of the new version
+    """
+    classes = load_class_names(artifact_path)
+    if not classes:
+        raise ValueError(f"No class list next to {artifact_path} ({class_names_path(artifact_path)})")
+    if input_size is None:
+        from model_backend import load_backend
+        input_size = load_backend(artifact_path).input_size
+
+    model_dir = _model_dir(name, root)
+    os.makedirs(model_dir, exist_ok=True)
+    # Claim the version directory atomically so concurrent registrations never collide
+    number = max([_version_number(v) for v in os.listdir(model_dir)] + [0]) + 1
+    while True:
+        version = f"v{number}"
+        try:
+            os.mkdir(os.path.join(model_dir, version))
+            break
+        except FileExistsError:
+            number += 1
+
+    version_dir = os.path.join(model_dir, version)
+    target = os.path.join(version_dir, 'model' + os.path.splitext(artifact_path)[1].lower())
+    shutil.copyfile(artifact_path, target)
+    shutil.copyfile(class_names_path(artifact_path), class_names_path(target))
+    if os.path.exists(calibration_path(artifact_path)):
+        shutil.copyfile(calibration_path(artifact_path), calibration_path(target))
+
+    metadata = {
+        'name': name,
+        'version': version,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'artifact': os.path.basename(target),
+        'source': os.path.abspath(artifact_path),
+        'format': os.path.splitext(target)[1][1:],
+        'classes': classes,
+        'input_size': list(input_size),
+        'metrics': metrics or {},
+        'sha256': sha256_file(target),
+        'size_bytes': os.path.getsize(target),
+        **(extra or {}),
+    }
+    _write_json(os.path.join(version_dir, METADATA_FILE), metadata)
+    return metadata
+
+
+def set_alias(name, alias, version, root=REGISTRY_DIR):
+    """Point `alias` (e.g. 'production') at an existing version"""
+    get_version(name, version, root)
+    aliases = load_aliases(name, root)
+    aliases[alias] = version
+    _write_json(os.path.join(_model_dir(name, root), ALIASES_FILE), aliases)
+
+
+# ==================== LOOKUP ====================
+
+def load_aliases(name, root=REGISTRY_DIR):
+    path = os.path.join(_model_dir(name, root), ALIASES_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def list_versions(name=DEFAULT_NAME, root=REGISTRY_DIR):
+    """Metadata of every registered version, oldest first"""
+    model_dir = _model_dir(name, root)
+    if not os.path.isdir(model_dir):
+        return []
+    versions = sorted((v for v in os.listdir(model_dir) if _version_number(v) > 0), key=_version_number)
+    return [get_version(name, v, root) for v in versions
+            if os.path.exists(os.path.join(model_dir, v, METADATA_FILE))]
+
+
+def get_version(name, version, root=REGISTRY_DIR):
+    """
+    Metadata of one version, with 'path' set to the artifact's location
+
+    Raises:
+        KeyError: If the version does not exist
+    """
+    version_dir = os.path.join(_model_dir(name, root), version)
+    try:
+        with open(os.path.join(version_dir, METADATA_FILE)) as f:
+            metadata = json.load(f)
+    except FileNotFoundError:
+        raise KeyError(f"{name} has no version {version}") from None
+    metadata['path'] = os.path.join(version_dir, metadata['artifact'])
+    return metadata
+
+
+def resolve(name, ref, root=REGISTRY_DIR):
+    """
+    Metadata for a version ('v3'), an alias ('production') or 'latest'
+
+    Raises:
+        KeyError: If nothing matches
+    """
+    if ref == 'latest':
+        versions = list_versions(name, root)
+        if not versions:
+            raise KeyError(f"{name} has no registered versions")
+        return versions[-1]
+    return get_version(name, load_aliases(name, root).get(ref, ref), root)
+
+
+def verify(name, ref, root=REGISTRY_DIR):
+    """True if the artifact still matches the checksum recorded at registration"""
+    metadata = resolve(name, ref, root)
+    return sha256_file(metadata['path']) == metadata['sha256']
+
+
+# ==================== CLI ====================
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Manage versioned model artifacts")
+    parser.add_argument("--root", default=REGISTRY_DIR)
+    parser.add_argument("--name", default=DEFAULT_NAME)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    reg = commands.add_parser("register", help="add an artifact as the next version")
+    reg.add_argument("artifact")
+    reg.add_argument("--metrics", default="{}", help="JSON object, e.g. '{\"val_accuracy\": 0.91}'")
+    reg.add_argument("--alias", default=None, help="also point this alias at the new version")
+
+    commands.add_parser("list", help="show versions and aliases")
+
+    alias = commands.add_parser("alias", help="point an alias at a version")
+    alias.add_argument("alias")
+    alias.add_argument("version")
+
+    check = commands.add_parser("verify", help="compare an artifact with its recorded checksum")
+    check.add_argument("ref")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    if args.command == "register":
+        metadata = register(args.artifact, args.name, json.loads(args.metrics), root=args.root)
+        if args.alias:
+            set_alias(args.name, args.alias, metadata['version'], args.root)
+        print(f"Registered {args.name} {metadata['version']} ({metadata['sha256'][:12]})")
+
+    elif args.command == "list":
+        aliases = load_aliases(args.name, args.root)
+        for m in list_versions(args.name, args.root):
+            tags = ', '.join(a for a, v in sorted(aliases.items()) if v == m['version'])
+            print(f"{m['version']:>5}  {m['created']}  {m['format']:<7} {len(m['classes']):>3} classes  "
+                  f"{json.dumps(m['metrics'])}  {tags}")
+
+    elif args.command == "alias":
+        set_alias(args.name, args.alias, args.version, args.root)
+        print(f"{args.name} {args.alias} -> {args.version}")
+
+    elif args.command == "verify":
+        ok = verify(args.name, args.ref, args.root)
+        print("OK" if ok else "CHECKSUM MISMATCH")
+        raise SystemExit(0 if ok else 1)
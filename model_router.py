@@ -0,0 +1,113 @@
+"""
+Model Router Module - Flower Disease Advisor
+Serves one model version while shadow-running a candidate on sampled traffic
+
+The candidate runs on its own background thread with a bounded backlog, so it
+never adds latency to the request being served; when it falls behind, samples
+are dropped and counted. Latency of both models and prediction agreement are
+exported on /metrics per model version.
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from lazy_imports import lazy_import
+from metrics import REGISTRY, Counter, Histogram
+from model_backend import load_backend
+
+cv2 = lazy_import('cv2')
+
+
+MAX_SHADOW_BACKLOG = 4   # batches waiting for the candidate before samples are dropped
+
+MODEL_LATENCY = REGISTRY.register(Histogram(
+    "flower_model_inference_seconds",
+    "Model forward-pass latency by model version and role (serving or shadow)",
+    ("version", "role"),
+))
+
+SHADOW_RESULTS = REGISTRY.register(Counter(
+    "flower_shadow_predictions_total",
+    "Shadow predictions by candidate version and outcome (agree, disagree, dropped, error)",
+    ("version", "result"),
+))
+
+
+class ShadowRouter:
+    """
+    Backend wrapper: predict() answers with the serving model and copies a
+    `sample_rate` fraction of batches to the candidate
+
+    Attributes other than predict (input_size, class_names, temperature, ...)
+    are the serving model's. The candidate is loaded on the shadow thread the
+    first time it is needed, keeping its start-up cost off the request path.
+    Agreement compares top-1 class names, so the two models may order (or
+    even choose) their classes differently.
+    """
+
+    def __init__(self, backend, version, candidate_path, candidate_version, sample_rate=0.1):
+        self.backend = backend
+        self.version = version
+        self.candidate_path = candidate_path
+        self.candidate_version = candidate_version
+        self.sample_rate = sample_rate
+        self._candidate = None
+        self._backlog = 0
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+    def predict(self, batch):
+        start = time.perf_counter()
+        probs = self.backend.predict(batch)
+        MODEL_LATENCY.observe(time.perf_counter() - start, self.version, 'serving')
+
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            self._submit(batch, probs)
+        return probs
+
+    def _submit(self, batch, probs):
+        with self._lock:
+            if self._backlog >= MAX_SHADOW_BACKLOG:
+                SHADOW_RESULTS.inc(self.candidate_version, 'dropped', amount=len(batch))
+                return
+            self._backlog += 1
+            if self._executor is None:
+                # Created on first use, so a preforking master never owns the thread
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='shadow')
+        self._executor.submit(self._shadow, batch, probs)
+
+    def _shadow(self, batch, probs):
+        try:
+            if self._candidate is None:
+                self._candidate = load_backend(self.candidate_path)
+            candidate = self._candidate
+            if tuple(candidate.input_size) != tuple(batch.shape[1:3]):
+                h, w = candidate.input_size
+                batch = np.stack([cv2.resize(img, (w, h), interpolation=cv2.INTER_AREA) for img in batch])
+
+            start = time.perf_counter()
+            shadow_probs = candidate.predict(batch)
+            MODEL_LATENCY.observe(time.perf_counter() - start, self.candidate_version, 'shadow')
+
+            served = _top_names(probs, self.backend.class_names)
+            shadowed = _top_names(shadow_probs, candidate.class_names)
+            agree = sum(a == b for a, b in zip(served, shadowed))
+            SHADOW_RESULTS.inc(self.candidate_version, 'agree', amount=agree)
+            SHADOW_RESULTS.inc(self.candidate_version, 'disagree', amount=len(served) - agree)
+        except Exception as e:
+            SHADOW_RESULTS.inc(self.candidate_version, 'error', amount=len(batch))
+            print(f"⚠️ Shadow model {self.candidate_version} failed: {e}")
+        finally:
+            with self._lock:
+                self._backlog -= 1
+
+
+def _top_names(probs, class_names):
+    return [class_names[i] if i < len(class_names) else str(i) for i in np.argmax(probs, axis=1)]
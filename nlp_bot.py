@@ -5,6 +5,7 @@ Advanced chatbot for disease diagnosis with NLP capabilities
 
 from difflib import get_close_matches
 from nlp_db import SYMPTOM_DB, SYMPTOM_KEYWORDS, find_matching_diseases
+from multilingual import normalize_query
 
 
 # ==================== FLOWER DISEASE NLP BOT CLASS ====================
@@ -21,6 +22,7 @@ class FlowerDiseaseNLPBot:
         self.symptom_keywords = SYMPTOM_KEYWORDS
         self.conversation_history = []
         self.current_disease = None
+        self.language = 'en'
     
     # ==================== MAIN RESPONSE METHOD ====================
     
@@ -40,6 +42,9 @@ class FlowerDiseaseNLPBot:
         
         text = user_text.lower().strip()
         
+        # Romanized text with English keywords added, for disease and symptom matching
+        self.language, query = normalize_query(text)
+        
         # Add to conversation history
         self.conversation_history.append({
             'user': user_text,
@@ -60,14 +65,14 @@ class FlowerDiseaseNLPBot:
             response = self._handle_exit()
         
         # Check for disease names directly
-        elif self._check_disease_name(text):
-            disease_name = self._check_disease_name(text)
+        elif self._check_disease_name(query):
+            disease_name = self._check_disease_name(query)
             response = self._format_disease_response(self.symptom_db[disease_name])
             self.current_disease = disease_name
         
         # Check for symptom keywords
-        elif self._find_diseases_by_symptoms(text):
-            matched_diseases = self._find_diseases_by_symptoms(text)
+        elif self._find_diseases_by_symptoms(query):
+            matched_diseases = self._find_diseases_by_symptoms(query)
             response = self._format_multiple_results(matched_diseases)
         
         # Fuzzy matching
@@ -3,6 +3,9 @@ NLP Database Module - Flower Disease Advisor
 Contains all symptom and disease data with keyword mappings
 """
 
+from multilingual import normalize_query
+
+
 # ==================== COMPLETE SYMPTOM DATABASE ====================
 
 SYMPTOM_DB = {
@@ -226,7 +229,7 @@ def find_matching_diseases(text):
     Returns:
         list: List of matching disease dictionaries
     """
-    text = text.lower()
+    _, text = normalize_query(text)
     matched = []
     matched_diseases = set()
     
@@ -0,0 +1,282 @@
+"""
+Perceptual Hash Module - Flower Disease Advisor
+pHash fingerprints and a multi-index Hamming search over past uploads,
+so near-duplicate photos reuse earlier inference results
+
+Usage (benchmark):
+    python phash.py --size 1000000 --queries 2000
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from lazy_imports import lazy_import
+
+cv2 = lazy_import('cv2')
+
+
+PHASH_DB = os.environ.get('PHASH_DB', 'phash.sqlite3')
+DUPLICATE_RADIUS = int(os.environ.get('DUPLICATE_RADIUS', '6'))   # max differing bits of 64
+HASH_RETENTION_SECONDS = 31 * 24 * 60 * 60
+REFRESH_SECONDS = 1.0   # how often a process picks up hashes added by other workers
+
+CHUNKS = 4
+CHUNK_BITS = 64 // CHUNKS
+CHUNK_MASK = (1 << CHUNK_BITS) - 1
+MERGE_AT = 4096         # unsorted tail size before it is merged into the sorted tables
+SQL_CHUNK = 500         # ids per IN (...) query; SQLite caps bound variables (999 before 3.32)
+
+_POPCOUNT8 = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+# ==================== HASHES ====================
+
+def _gray(img_bgr):
+    return cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY) if img_bgr.ndim == 3 else img_bgr
+
+
+def _pack(bits):
+    """64 booleans -> Python int, first bit most significant"""
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), 'big')
+
+
+def phash(img_bgr):
+    """DCT hash: low-frequency 8x8 DCT coefficients against their median"""
+    small = cv2.resize(_gray(img_bgr), (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:8, :8].ravel()
+    return _pack(low > np.median(low[1:]))
+
+
+def popcount(values):
+    """Set bits per element of a uint64 array"""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(values)
+    return _POPCOUNT8[values.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+
+# ==================== MULTI-INDEX HASHING ====================
+
+class MultiIndexHash:
+    """
+    Hamming-radius search over 64-bit hashes
+
+    Each hash is split into CHUNKS 16-bit substrings with one sorted table per
+    substring. Two hashes within distance r share at least one substring
+    within distance r // CHUNKS, so probing each table for the query's
+    substring (and its 1-bit neighbours when r >= CHUNKS) finds every match
+    without scanning. New hashes go to a small unsorted tail that is scanned
+    directly and merged into the tables every MERGE_AT inserts.
+    """
+
+    def __init__(self):
+        self._hashes = np.empty(0, dtype=np.uint64)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._tables = [(np.empty(0, dtype=np.uint16), np.empty(0, dtype=np.int64))] * CHUNKS
+        self._tail_hashes = []
+        self._tail_ids = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._hashes) + len(self._tail_hashes)
+
+    def add(self, item_id, value):
+        with self._lock:
+            self._tail_hashes.append(value)
+            self._tail_ids.append(item_id)
+            if len(self._tail_hashes) >= MERGE_AT:
+                self._merge()
+
+    def add_many(self, item_ids, values):
+        with self._lock:
+            self._tail_hashes.extend(values)
+            self._tail_ids.extend(item_ids)
+            self._merge()
+
+    def _merge(self):
+        self._hashes = np.concatenate([self._hashes, np.array(self._tail_hashes, dtype=np.uint64)])
+        self._ids = np.concatenate([self._ids, np.array(self._tail_ids, dtype=np.int64)])
+        self._tail_hashes, self._tail_ids = [], []
+
+        tables = []
+        for chunk in range(CHUNKS):
+            values = ((self._hashes >> np.uint64(chunk * CHUNK_BITS)) & np.uint64(CHUNK_MASK)).astype(np.uint16)
+            order = np.argsort(values, kind='stable')
+            tables.append((values[order], order))
+        self._tables = tables
+
+    def search(self, value, radius):
+        """
+        All stored hashes within `radius` bits
+
+        Returns:
+            list: (id, distance) pairs, closest first
+        """
+        if radius >= 2 * CHUNKS:
+            raise ValueError(f"radius must be below {2 * CHUNKS}")
+
+        with self._lock:
+            hashes, ids, tables = self._hashes, self._ids, self._tables
+            tail_hashes = np.array(self._tail_hashes, dtype=np.uint64)
+            tail_ids = np.array(self._tail_ids, dtype=np.int64)
+
+        query = np.uint64(value)
+        flips = np.array([0] + [1 << b for b in range(CHUNK_BITS)] if radius >= CHUNKS else [0], dtype=np.uint16)
+
+        positions = []
+        for chunk, (values, order) in enumerate(tables):
+            probes = np.uint16((value >> (chunk * CHUNK_BITS)) & CHUNK_MASK) ^ flips
+            lo = np.searchsorted(values, probes, 'left')
+            hi = np.searchsorted(values, probes, 'right')
+            positions.extend(order[a:b] for a, b in zip(lo, hi) if b > a)
+
+        found_ids, found_dist = [tail_ids], [popcount(tail_hashes ^ query)]
+        if positions:
+            candidates = np.unique(np.concatenate(positions))
+            found_ids.append(ids[candidates])
+            found_dist.append(popcount(hashes[candidates] ^ query))
+
+        found_ids, found_dist = np.concatenate(found_ids), np.concatenate(found_dist)
+        keep = found_dist <= radius
+        order = np.argsort(found_dist[keep], kind='stable')
+        return [(int(i), int(d)) for i, d in zip(found_ids[keep][order], found_dist[keep][order])]
+
+
+# ==================== PERSISTENT INDEX ====================
+
+class DuplicateIndex:
+    """
+    Perceptual hashes of analyzed uploads with their results, stored in SQLite
+
+    Each process keeps its own MultiIndexHash and pulls rows added by other
+    workers at most every REFRESH_SECONDS. Results are only reused for the
+    model that produced them.
+    """
+
+    def __init__(self, db_path=PHASH_DB, radius=DUPLICATE_RADIUS):
+        self.db_path = db_path
+        self.radius = radius
+        self._index = None
+        self._last_id = 0
+        self._last_refresh = 0.0
+        self._refresh_lock = threading.Lock()
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS hashes ("
+                " id INTEGER PRIMARY KEY, hash INTEGER NOT NULL, model TEXT NOT NULL,"
+                " created REAL NOT NULL, result TEXT NOT NULL)"
+            )
+            conn.execute("DELETE FROM hashes WHERE created < ?", (time.time() - HASH_RETENTION_SECONDS,))
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def _refresh(self):
+        """Load rows this process has not seen (all of them on first use)"""
+        now = time.monotonic()
+        if self._index is not None and now - self._last_refresh < REFRESH_SECONDS:
+            return
+        with self._refresh_lock:
+            if self._index is None:
+                self._index = MultiIndexHash()
+            with self._connect() as conn:
+                rows = conn.execute("SELECT id, hash FROM hashes WHERE id > ? ORDER BY id",
+                                    (self._last_id,)).fetchall()
+            if rows:
+                # SQLite integers are signed; hashes are stored as signed 64-bit
+                self._index.add_many([r[0] for r in rows], [r[1] & 0xFFFFFFFFFFFFFFFF for r in rows])
+                self._last_id = rows[-1][0]
+            self._last_refresh = now
+
+    def find(self, value, model):
+        """
+        Closest earlier result for this model within the radius
+
+        Returns:
+            tuple: (result dict, distance) or None
+        """
+        self._refresh()
+        matches = self._index.search(value, self.radius)
+        if not matches:
+            return None
+
+        distance = dict(matches)
+        # Nearest first, so the first chunk with a row for this model holds the best match
+        ids = sorted(distance, key=distance.get)
+        with self._connect() as conn:
+            for i in range(0, len(ids), SQL_CHUNK):
+                chunk = ids[i:i + SQL_CHUNK]
+                rows = conn.execute(
+                    f"SELECT id, result FROM hashes WHERE model = ? AND id IN ({','.join('?' * len(chunk))})",
+                    (model, *chunk)
+                ).fetchall()
+                if rows:
+                    best_id, result = min(rows, key=lambda r: distance[r[0]])
+                    return json.loads(result), distance[best_id]
+        return None
+
+    def add(self, value, model, result):
+        """Remember the result for a hash"""
+        signed = value - (1 << 64) if value >= (1 << 63) else value
+        with self._connect() as conn:
+            conn.execute("INSERT INTO hashes (hash, model, created, result) VALUES (?, ?, ?, ?)",
+                         (signed, model, time.time(), json.dumps(result)))
+        self._last_refresh = 0.0   # make the next find() pick it up
+
+
+# ==================== BENCHMARK ====================
+
+def _flip_bits(values, bits, rng):
+    """Copy of `values` with `bits` random bits flipped in each"""
+    flipped = values.copy()
+    for i in range(len(values)):
+        for b in rng.choice(64, size=bits, replace=False):
+            flipped[i] ^= np.uint64(1) << np.uint64(b)
+    return flipped
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Measure near-duplicate lookup latency")
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--radius", type=int, default=DUPLICATE_RADIUS)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    stored = rng.integers(0, 2 ** 63, size=args.size, dtype=np.uint64) * np.uint64(2) + \
+        rng.integers(0, 2, size=args.size, dtype=np.uint64)
+
+    index = MultiIndexHash()
+    start = time.perf_counter()
+    index.add_many(list(range(args.size)), stored.tolist())
+    print(f"Indexed {args.size:,} hashes in {time.perf_counter() - start:.2f} s, radius {args.radius}")
+
+    picks = rng.integers(0, args.size, size=args.queries)
+    workloads = {
+        'exact duplicate': stored[picks],
+        f'{args.radius} bits changed': _flip_bits(stored[picks], args.radius, rng),
+        'unrelated photo': rng.integers(0, 2 ** 63, size=args.queries, dtype=np.uint64),
+    }
+    for name, queries in workloads.items():
+        times, hits = [], 0
+        for q in queries.tolist():
+            t = time.perf_counter()
+            hits += bool(index.search(q, args.radius))
+            times.append(time.perf_counter() - t)
+        times.sort()
+        print(f"{name:<18} p50 {times[len(times) // 2] * 1e6:8.1f} µs  "
+              f"p99 {times[int(len(times) * 0.99)] * 1e6:8.1f} µs  hits {hits}/{len(times)}")
+
+    sample = np.array(stored[:2000])
+    start = time.perf_counter()
+    for q in sample[:20].tolist():
+        popcount(stored ^ np.uint64(q))
+    print(f"Linear scan for comparison: {(time.perf_counter() - start) / 20 * 1000:8.2f} ms per query")
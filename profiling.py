@@ -0,0 +1,140 @@
+"""
+Profiling Module - Flower Disease Advisor
+Opt-in cProfile runs for single requests, restricted to holders of PROFILE_TOKEN
+"""
+
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import threading
+import time
+import uuid
+
+from flask import g, jsonify, request
+
+
+PROFILE_DIR = os.environ.get('PROFILE_DIR', 'profiles')
+# Sent as the X-Profile-Token header; profiling is off while unset
+PROFILE_TOKEN = os.environ.get('PROFILE_TOKEN', '')
+PROFILE_RETENTION_SECONDS = 7 * 24 * 60 * 60
+MAX_PROFILES = int(os.environ.get('MAX_PROFILES', '200'))
+
+SORT_KEYS = {'cumulative', 'tottime', 'calls', 'ncalls'}
+
+PROFILED_ENDPOINTS = {'upload_image_chat', 'upload_image_tab', 'chat_message', 'search_symptoms'}
+
+# cProfile cannot run two profilers at once; concurrent requests skip profiling
+_profiler_lock = threading.Lock()
+
+
+# ==================== HELPERS ====================
+
+def is_admin():
+    """
+    Check the request's X-Profile-Token against PROFILE_TOKEN
+
+    Login names are not checked: /login accepts any username.
+    """
+    token = request.headers.get('X-Profile-Token', '')
+    return bool(PROFILE_TOKEN) and hmac.compare_digest(token.encode(), PROFILE_TOKEN.encode())
+
+
+def profiling_requested():
+    """Profile when the X-Profile header or ?profile=1 is set"""
+    return request.headers.get('X-Profile') == '1' or request.args.get('profile') == '1'
+
+
+def profile_path(profile_id):
+    """Location of a stored profile"""
+    return os.path.join(PROFILE_DIR, f"{profile_id}.prof")
+
+
+def prune_profiles(max_age=PROFILE_RETENTION_SECONDS, max_count=MAX_PROFILES):
+    """Delete profiles older than max_age seconds, then the oldest beyond max_count"""
+    try:
+        entries = [e for e in os.scandir(PROFILE_DIR) if e.name.endswith('.prof')]
+    except FileNotFoundError:
+        return
+    entries.sort(key=lambda e: e.stat().st_mtime, reverse=True)
+    cutoff = time.time() - max_age
+    for i, entry in enumerate(entries):
+        if i >= max_count or entry.stat().st_mtime < cutoff:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass  # removed by another worker
+
+
+def format_stats(path, limit=30, sort='cumulative'):
+    """
+    Render a stored profile as text
+
+    Args:
+        path (str): .prof file
+        limit (int): Number of functions to show
+        sort (str): pstats sort key
+
+    Returns:
+        str: pstats report
+    """
+    out = io.StringIO()
+    pstats.Stats(path, stream=out).sort_stats(sort).print_stats(limit)
+    return out.getvalue()
+
+
+# ==================== FLASK INTEGRATION ====================
+
+def init_app(app):
+    """Register profiling hooks and the profile download endpoint"""
+
+    @app.before_request
+    def _start_profiler():
+        if request.endpoint not in PROFILED_ENDPOINTS or not profiling_requested():
+            return
+        if not is_admin() or not _profiler_lock.acquire(blocking=False):
+            return
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+    @app.after_request
+    def _store_profile(response):
+        profiler = g.pop('profiler', None)
+        if profiler is None:
+            if request.endpoint in PROFILED_ENDPOINTS and profiling_requested():
+                response.headers['X-Profile-Skipped'] = 'missing/invalid X-Profile-Token or profiler busy'
+            return response
+
+        profiler.disable()
+        _profiler_lock.release()
+
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        profile_id = uuid.uuid4().hex
+        profiler.dump_stats(profile_path(profile_id))
+        prune_profiles()
+        response.headers['X-Profile-Id'] = profile_id
+        return response
+
+    @app.teardown_request
+    def _release_profiler(error=None):
+        # after_request is skipped on unhandled exceptions
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.disable()
+            _profiler_lock.release()
+
+    @app.route('/api/profiles/<profile_id>', methods=['GET'])
+    def get_profile(profile_id):
+        """Return a stored profile as a text report"""
+        if not is_admin():
+            return jsonify({'error': 'Valid X-Profile-Token required'}), 403
+
+        path = profile_path(os.path.basename(profile_id))
+        if not os.path.exists(path):
+            return jsonify({'error': 'Profile not found'}), 404
+
+        sort = request.args.get('sort', 'cumulative')
+        if sort not in SORT_KEYS:
+            return jsonify({'error': f'sort must be one of {sorted(SORT_KEYS)}'}), 400
+        return format_stats(path, sort=sort), 200, {'Content-Type': 'text/plain; charset=utf-8'}
@@ -0,0 +1,85 @@
+"""
+Profile Replay Module - Flower Disease Advisor
+Replays a captured request file through the app with profiling enabled
+
+Request file format (JSON):
+    {
+        "method": "POST",
+        "path": "/api/upload-image-tab",
+        "form": {"description": "brown spots on petals"},
+        "files": {"file": "0bbb8bce-2020-416b-8bd6-c160c2db9921___RS_Early.B 8386.JPG"},
+        "json": null
+    }
+
+Usage:
+    python replay_profile.py slow_upload.json --sort tottime --limit 40
+"""
+
+import argparse
+import json
+import os
+import secrets
+
+import profiling
+from app import app
+
+
+REPLAY_USER = "profile-replay"
+
+
+def load_request(path):
+    """Read a captured request description"""
+    with open(path) as f:
+        return json.load(f)
+
+
+def replay(captured):
+    """
+    Send one captured request through the Flask test client with the profiling token
+
+    Args:
+        captured (dict): Request description
+
+    Returns:
+        tuple: (response, profile_id or None)
+    """
+    if not profiling.PROFILE_TOKEN:
+        profiling.PROFILE_TOKEN = secrets.token_hex(16)
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['user'] = REPLAY_USER
+        sess['chat_history'] = []
+
+    kwargs = {'headers': {'X-Profile': '1', 'X-Profile-Token': profiling.PROFILE_TOKEN}}
+    if captured.get('json') is not None:
+        kwargs['json'] = captured['json']
+    else:
+        data = dict(captured.get('form') or {})
+        for field, file_path in (captured.get('files') or {}).items():
+            data[field] = (open(file_path, 'rb'), os.path.basename(file_path))
+        kwargs['data'] = data
+        kwargs['content_type'] = 'multipart/form-data'
+
+    response = client.open(captured['path'], method=captured.get('method', 'POST'), **kwargs)
+    return response, response.headers.get('X-Profile-Id')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Replay a captured request with profiling on")
+    parser.add_argument("request_file")
+    parser.add_argument("--sort", choices=sorted(profiling.SORT_KEYS), default="cumulative")
+    parser.add_argument("--limit", type=int, default=30)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    response, profile_id = replay(load_request(args.request_file))
+    print(f"Status: {response.status_code}")
+
+    if profile_id is None:
+        print("⚠️ No profile recorded:", response.headers.get('X-Profile-Skipped', 'endpoint not profiled'))
+    else:
+        path = profiling.profile_path(profile_id)
+        print(f"Profile stored at {path}\n")
+        print(profiling.format_stats(path, limit=args.limit, sort=args.sort))
@@ -0,0 +1,155 @@
+"""
+Traffic Replay Module - Flower Disease Advisor
+Re-issues requests captured by capture.py against a running server
+
+Usage:
+    python replay_requests.py captures/requests.jsonl --url http://localhost:5000
+    python replay_requests.py captures/requests.jsonl --url http://localhost:5000 --speed 10
+    python replay_requests.py captures/requests.jsonl --url http://localhost:5000 --speed 0   # flat out
+"""
+
+import argparse
+import glob
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmark_api import HttpDriver, load_sample_images, summarize
+
+
+# Routes whose replay would change auth state rather than exercise the service
+SKIPPED_ROUTES = {'/login', '/logout', '/static/<path:filename>'}
+
+# JSON body field carrying the captured text, by route
+JSON_FIELDS = {
+    '/api/chat-message': 'message',
+    '/api/search-symptoms': 'symptom',
+    '/api/search-keyword': 'keyword',
+}
+
+
+# ==================== LOADING ====================
+
+def capture_files(path):
+    """The capture file plus its rotated backups, oldest first"""
+    backups = [p for p in glob.glob(f"{path}.*") if p.rsplit('.', 1)[1].isdigit()]   # not <path>.lock
+    backups.sort(key=lambda p: int(p.rsplit('.', 1)[1]), reverse=True)
+    return backups + ([path] if os.path.exists(path) else [])
+
+
+def load_records(path):
+    """
+    Read captured records in time order
+
+    Returns:
+        list: Records with replayable routes
+    """
+    records = []
+    for file_path in capture_files(path):
+        with open(file_path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    if record['route'] not in SKIPPED_ROUTES:
+                        records.append(record)
+    records.sort(key=lambda r: r['ts'])
+    return records
+
+
+def to_request(record, images):
+    """
+    Rebuild a request from a captured record
+
+    Uploaded photos are not stored, so each image hash is mapped onto one of
+    the repo's sample images (the same hash always picks the same sample).
+
+    Returns:
+        tuple: (method, path, json_body, multipart fields)
+    """
+    method, path, text = record['method'], record.get('path', record['route']), record.get('text')
+    if method == 'GET':
+        return method, path, None, None
+    if record['route'] in JSON_FIELDS:
+        return method, path, {JSON_FIELDS[record['route']]: text or ''}, None
+    if record.get('image_hash'):
+        name, data = images[int(record['image_hash'][:8], 16) % len(images)]
+        return method, path, None, {'file': (name, data), 'description': text or ''}
+    return method, path, {}, None
+
+
+# ==================== REPLAY ====================
+
+def replay(records, driver, images, speed, concurrency):
+    """
+    Send records at their captured pace divided by `speed` (0 = no waiting)
+
+    Returns:
+        dict: Latency per route, errors and how far the replay fell behind schedule
+    """
+    lock = threading.Lock()
+    latencies, errors, lag = {}, {'count': 0}, []
+
+    def send(record):
+        method, path, json_body, fields = to_request(record, images)
+        start = time.perf_counter()
+        try:
+            status = driver.send(path, json_body, fields, method=method)
+        except Exception:
+            status = 0
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.setdefault(record['route'], []).append(elapsed)
+            if status == 0 or status >= 400:
+                errors['count'] += 1
+
+    first_ts = records[0]['ts'] if records else 0
+    replay_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for record in records:
+            if speed > 0:
+                due = replay_start + (record['ts'] - first_ts) / speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    lag.append(-delay)
+            pool.submit(send, record)
+    wall = time.perf_counter() - replay_start
+
+    all_latencies = [v for values in latencies.values() for v in values]
+    return {
+        'requests': len(all_latencies),
+        'errors': errors['count'],
+        'wall_seconds': round(wall, 3),
+        'captured_seconds': round(records[-1]['ts'] - first_ts, 3) if records else 0,
+        'throughput_rps': round(len(all_latencies) / wall, 2) if wall else None,
+        'max_schedule_lag_ms': round(max(lag) * 1000, 3) if lag else 0.0,
+        'latency': summarize(all_latencies),
+        'per_route': {route: summarize(values) for route, values in sorted(latencies.items())},
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Replay captured traffic against a server")
+    parser.add_argument("capture_file")
+    parser.add_argument("--url", default="http://localhost:5000")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="1 = original pace, 10 = ten times faster, 0 = as fast as possible")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--output", default=None)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    records = load_records(args.capture_file)
+    print(f"Replaying {len(records)} requests against {args.url} at speed {args.speed}")
+
+    result = replay(records, HttpDriver(args.url), load_sample_images(), args.speed, args.concurrency)
+    print(json.dumps(result, indent=2))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result, f, indent=2)
@@ -0,0 +1,306 @@
+"""
+Storage Module - Flower Disease Advisor
+Content-addressed upload storage with sharded keys, reference counting and expiry
+
+ObjectStore names the S3-style calls UploadStore needs (put/get/head/delete/
+list by key, plus a public URL). Only LocalObjectStore exists today, and the
+app still decodes images and generates thumbnails from local_path(); a remote
+store would also need a local read-through copy for those.
+"""
+
+import hashlib
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+
+
+UPLOAD_MAX_AGE_SECONDS = 31 * 24 * 60 * 60   # matches Flask's default permanent session lifetime
+UNREFERENCED_GRACE_SECONDS = 60 * 60         # uploads not (yet) in any chat history
+GC_INTERVAL_SECONDS = 15 * 60
+# Partial uploads are written here, outside the publicly served static/ tree;
+# keep it on the same filesystem as the store so moving a finished file is a rename
+STAGING_DIR = os.environ.get('UPLOAD_STAGING', '.upload_staging')
+
+
+# ==================== OBJECT STORES ====================
+
+class ObjectStore(ABC):
+    """Minimal S3-style interface; keys are '/'-separated strings"""
+
+    @abstractmethod
+    def put_object(self, key, body):
+        """Store bytes or a file-like object under `key`"""
+
+    @abstractmethod
+    def get_object(self, key):
+        """Object contents as bytes"""
+
+    @abstractmethod
+    def head_object(self, key):
+        """Metadata dict ({'key', 'size', 'last_modified'}) or None if missing"""
+
+    @abstractmethod
+    def delete_object(self, key):
+        """Remove an object; missing keys are ignored"""
+
+    @abstractmethod
+    def list_objects(self, prefix=''):
+        """Metadata of every object whose key starts with `prefix`"""
+
+    @abstractmethod
+    def url(self, key):
+        """Public URL of an object"""
+
+    @abstractmethod
+    def key_from_url(self, url):
+        """Key behind a URL returned by url(), or None for other URLs"""
+
+    def put_file(self, key, src_path):
+        """Store a finished local file; stores that can adopt it without copying override this"""
+        with open(src_path, 'rb') as f:
+            self.put_object(key, f)
+
+    def local_path(self, key):
+        """Filesystem path of an object, or None for remote stores"""
+        return None
+
+
+class LocalObjectStore(ObjectStore):
+    """Objects stored as files under a root directory, served from `url_prefix`"""
+
+    def __init__(self, root, url_prefix='/static/uploads/'):
+        self.root = root
+        self.url_prefix = url_prefix
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key):
+        path = os.path.normpath(os.path.join(self.root, key))
+        if not path.startswith(os.path.normpath(self.root) + os.sep):
+            raise ValueError(f"Invalid key: {key}")
+        return path
+
+    def put_object(self, key, body):
+        """Write bytes or a file-like object atomically"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            if isinstance(body, (bytes, bytearray)):
+                f.write(body)
+            else:
+                shutil.copyfileobj(body, f)
+        os.replace(tmp_path, path)
+
+    def put_file(self, key, src_path):
+        """Adopt an already written local file without copying it"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(src_path, path)
+
+    def get_object(self, key):
+        with open(self._path(key), 'rb') as f:
+            return f.read()
+
+    def head_object(self, key):
+        try:
+            st = os.stat(self._path(key))
+        except FileNotFoundError:
+            return None
+        return {'key': key, 'size': st.st_size, 'last_modified': st.st_mtime}
+
+    def delete_object(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def list_objects(self, prefix=''):
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if name.endswith('.tmp'):
+                    continue
+                key = os.path.relpath(os.path.join(dirpath, name), self.root).replace(os.sep, '/')
+                if key.startswith(prefix):
+                    yield self.head_object(key)
+
+    def url(self, key):
+        return self.url_prefix + key
+
+    def key_from_url(self, url):
+        return url[len(self.url_prefix):] if url and url.startswith(self.url_prefix) else None
+
+    def local_path(self, key):
+        return self._path(key)
+
+
+# ==================== UPLOAD STORE ====================
+
+def shard_key(digest, ext):
+    """ab/cd/abcd....ext - two directory levels keep each directory small"""
+    return f"{digest[:2]}/{digest[2:4]}/{digest}.{ext}"
+
+
+def key_digest(key):
+    """sha256 hex digest a shard_key() was built from"""
+    return key.rsplit('/', 1)[-1].split('.', 1)[0]
+
+
+class UploadStore:
+    """
+    Deduplicated uploads with reference counts kept in SQLite
+
+    A chat history entry holds a reference to its image, and so does an
+    upload whose URL is handed out in a one-off response (put_upload(keep=True)).
+    Objects are garbage-collected when nothing references them after a grace
+    period, or when nothing has referenced them for UPLOAD_MAX_AGE_SECONDS
+    (sessions expire without telling the server). Callbacks registered with
+    on_delete() remove derived files such as thumbnails.
+    """
+
+    def __init__(self, object_store, index_path, max_age=UPLOAD_MAX_AGE_SECONDS,
+                 grace=UNREFERENCED_GRACE_SECONDS, staging_dir=STAGING_DIR):
+        self.objects = object_store
+        self.index_path = index_path
+        self.max_age = max_age
+        self.grace = grace
+        self.staging_dir = staging_dir
+        self._delete_callbacks = []
+        self._gc_thread = None
+        os.makedirs(staging_dir, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS uploads ("
+                " key TEXT PRIMARY KEY, size INTEGER NOT NULL, created REAL NOT NULL,"
+                " last_ref REAL NOT NULL, refcount INTEGER NOT NULL DEFAULT 0)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.index_path, timeout=10)
+
+    # ---------- writes ----------
+
+    def put_upload(self, stream, filename, keep=False):
+        """
+        Store an upload, hashing while it is written
+
+        Args:
+            stream: Readable binary stream
+            filename (str): Original name, only used for the extension
+            keep (bool): Hold a reference so the object lives for max_age, for
+                URLs returned to clients without a chat history entry
+
+        Returns:
+            tuple: (key, sha256 hex digest, True if the content was new)
+        """
+        ext = filename.rsplit('.', 1)[1].lower() if '.' in filename else 'bin'
+        h = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=self.staging_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in iter(lambda: stream.read(1024 * 1024), b''):
+                    h.update(chunk)
+                    f.write(chunk)
+            digest = h.hexdigest()
+            key = shard_key(digest, ext)
+
+            now = time.time()
+            refs = 1 if keep else 0
+            with self._connect() as conn:
+                # Holding the write lock from the existence check to the upsert keeps
+                # collect_garbage from deleting the object in between
+                conn.execute("BEGIN IMMEDIATE")
+                created = self.objects.head_object(key) is None
+                if created:
+                    self.objects.put_file(key, tmp_path)
+                conn.execute(
+                    "INSERT INTO uploads (key, size, created, last_ref, refcount) VALUES (?, ?, ?, ?, ?)"
+                    " ON CONFLICT(key) DO UPDATE SET last_ref = excluded.last_ref,"
+                    " refcount = refcount + excluded.refcount",
+                    (key, self.objects.head_object(key)['size'], now, now, refs)
+                )
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return key, digest, created
+
+    def add_ref(self, key):
+        """Record that a chat history now points at `key`"""
+        with self._connect() as conn:
+            conn.execute("UPDATE uploads SET refcount = refcount + 1, last_ref = ? WHERE key = ?",
+                         (time.time(), key))
+
+    def release(self, key):
+        """Drop one reference to `key`"""
+        with self._connect() as conn:
+            conn.execute("UPDATE uploads SET refcount = MAX(refcount - 1, 0), last_ref = ? WHERE key = ?",
+                         (time.time(), key))
+
+    # ---------- reads ----------
+
+    def local_path(self, key):
+        return self.objects.local_path(key)
+
+    def url(self, key):
+        return self.objects.url(key)
+
+    def key_from_url(self, url):
+        return self.objects.key_from_url(url)
+
+    # ---------- garbage collection ----------
+
+    def on_delete(self, callback):
+        """Call callback(key) after an object is garbage-collected"""
+        self._delete_callbacks.append(callback)
+
+    def collect_garbage(self):
+        """
+        Delete expired objects
+
+        Each row is deleted with the expiry condition checked again, in the same
+        write transaction as the object, so an upload or reference that arrived
+        since the scan keeps its object.
+
+        Returns:
+            int: Number of objects removed
+        """
+        now = time.time()
+        expiry = "((refcount = 0 AND last_ref < ?) OR last_ref < ?)"
+        limits = (now - self.grace, now - self.max_age)
+        conn = self._connect()
+        try:
+            expired = [row[0] for row in conn.execute(f"SELECT key FROM uploads WHERE {expiry}", limits)]
+            deleted = []
+            for key in expired:
+                with conn:
+                    conn.execute("BEGIN IMMEDIATE")
+                    if conn.execute(f"DELETE FROM uploads WHERE key = ? AND {expiry}", (key, *limits)).rowcount == 1:
+                        self.objects.delete_object(key)
+                        deleted.append(key)
+        finally:
+            conn.close()
+        for key in deleted:
+            for callback in self._delete_callbacks:
+                callback(key)
+        return len(deleted)
+
+    def start_gc(self, interval=GC_INTERVAL_SECONDS):
+        """Run collect_garbage periodically in a daemon thread"""
+        if self._gc_thread is not None:
+            return
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.collect_garbage()
+                except Exception as e:
+                    print(f"⚠️ Upload GC failed: {e}")
+
+        self._gc_thread = threading.Thread(target=loop, name='upload-gc', daemon=True)
+        self._gc_thread.start()
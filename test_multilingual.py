@@ -0,0 +1,36 @@
+"""
+Multilingual Tests - Flower Disease Advisor
+Synonym tables must only produce keywords the English matchers know
+
+Run with: python -m pytest test_multilingual.py
+"""
+
+import pytest
+
+import app
+from multilingual import BLOCK_LANGUAGES, _read_table, detect_language, normalize_query
+
+
+LANGUAGES_WITH_TABLES = [lang for lang in BLOCK_LANGUAGES if _read_table(lang) is not None]
+
+
+@pytest.mark.parametrize("language", LANGUAGES_WITH_TABLES)
+def test_synonym_targets_are_keywords(language):
+    targets = set(_read_table(language).values())
+    assert targets - set(app.SYMPTOM_KEYWORDS) == set()
+
+
+def test_romanized_hindi_is_expanded():
+    language, text = normalize_query("gulab ke patton par kale dhabbe")
+    assert language == 'hi'
+    assert 'rose' in text and 'black spot' in text
+
+
+def test_english_passes_through():
+    assert detect_language("white powdery coating on my rose") == 'en'
+    assert normalize_query("White Powdery coating") == ('en', "white powdery coating")
+
+
+def test_translated_lily_query_finds_lily_disease():
+    names = {d['name'] for d in app.find_disease_by_symptoms("लिली पर भूरे धब्बे")}
+    assert "Lily Botrytis Blight" in names
@@ -0,0 +1,170 @@
+"""
+Thumbnails Module - Flower Disease Advisor
+Resized WebP/JPEG derivatives of uploads, generated off the request path
+"""
+
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
+
+import numpy as np
+from flask import redirect, send_from_directory
+
+from lazy_imports import lazy_import
+
+cv2 = lazy_import('cv2')
+
+
+THUMB_FOLDER = "static/thumbs"
+
+# Longest side in pixels per named size
+THUMB_SIZES = {'sm': 160, 'md': 480}
+
+# Thumbnail URLs embed a content digest, so they never change and can be cached forever
+THUMB_CACHE_SECONDS = 365 * 24 * 60 * 60
+
+DIGEST_LENGTH = 16
+
+
+# ==================== HELPERS ====================
+
+def file_digest(path):
+    """Short content hash used in thumbnail URLs"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(chunk)
+    return h.hexdigest()[:DIGEST_LENGTH]
+
+
+def _is_hex(value):
+    return all(c in '0123456789abcdef' for c in value)
+
+
+def _encode_params(ext):
+    if ext == 'webp':
+        return [cv2.IMWRITE_WEBP_QUALITY, 80]
+    return [cv2.IMWRITE_JPEG_QUALITY, 85]
+
+
+# ==================== PIPELINE ====================
+
+class ThumbnailPipeline:
+    """
+    Generates every THUMB_SIZES variant of an upload in a background pool
+
+    Originals are read through `upload_store` (its local_path() and url()), so
+    thumbnails follow whatever storage backs the uploads.
+    """
+
+    def __init__(self, upload_store, thumb_folder=THUMB_FOLDER, max_workers=2):
+        self.upload_store = upload_store
+        self.thumb_folder = thumb_folder
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='thumbs')
+        os.makedirs(thumb_folder, exist_ok=True)
+
+    @cached_property
+    def ext(self):
+        """WebP when this OpenCV build can encode it, JPEG otherwise (probed on first use)"""
+        try:
+            ok, _ = cv2.imencode('.webp', np.zeros((8, 8, 3), dtype=np.uint8))
+            return 'webp' if ok else 'jpg'
+        except cv2.error:
+            return 'jpg'
+
+    def thumb_name(self, digest, size):
+        return f"{digest}_{size}.{self.ext}"
+
+    def thumb_path(self, digest, size):
+        return os.path.join(self.thumb_folder, self.thumb_name(digest, size))
+
+    def url(self, digest, filename, size='md'):
+        """Public URL; the digest makes it unique per content"""
+        return f"/thumbs/{size}/{digest}/{filename}"
+
+    def delete(self, digest):
+        """Remove every size of one upload's thumbnails"""
+        for size in THUMB_SIZES:
+            try:
+                os.remove(self.thumb_path(digest[:DIGEST_LENGTH], size))
+            except FileNotFoundError:
+                pass
+
+    def schedule(self, filepath, digest=None):
+        """
+        Queue thumbnail generation for a saved upload
+
+        Args:
+            filepath (str): Saved original
+            digest (str): Content hash if the caller already computed one
+
+        Returns:
+            str: Content digest to embed in thumbnail URLs
+        """
+        digest = digest[:DIGEST_LENGTH] if digest else file_digest(filepath)
+        self._pool.submit(self.generate, filepath, digest)
+        return digest
+
+    def generate(self, filepath, digest, sizes=None):
+        """
+        Write resized variants of one image
+
+        Returns:
+            bool: False if the original could not be decoded
+        """
+        sizes = sizes or list(THUMB_SIZES)
+        missing = [s for s in sizes if not os.path.exists(self.thumb_path(digest, s))]
+        if not missing:
+            return True
+
+        img = cv2.imread(filepath)
+        if img is None:
+            return False
+
+        h, w = img.shape[:2]
+        for size in missing:
+            scale = min(1.0, THUMB_SIZES[size] / max(h, w))
+            thumb = cv2.resize(img, (max(1, int(w * scale)), max(1, int(h * scale))),
+                               interpolation=cv2.INTER_AREA)
+            ok, buf = cv2.imencode(f'.{self.ext}', thumb, _encode_params(self.ext))
+            if not ok:
+                return False
+
+            # Write then rename so readers never see a partial file
+            final_path = self.thumb_path(digest, size)
+            tmp_path = f"{final_path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(buf.tobytes())
+            os.replace(tmp_path, final_path)
+        return True
+
+
+# ==================== FLASK INTEGRATION ====================
+
+def init_app(app, pipeline):
+    """Register the thumbnail route"""
+
+    @app.route('/thumbs/<size>/<digest>/<path:filename>', methods=['GET'])
+    def thumbnail(size, digest, filename):
+        """Serve a thumbnail, generating it on demand or falling back to the original"""
+        original = pipeline.upload_store.url(filename)
+        if size not in THUMB_SIZES or len(digest) != DIGEST_LENGTH or not _is_hex(digest):
+            return redirect(original)
+
+        if not os.path.exists(pipeline.thumb_path(digest, size)):
+            try:
+                filepath = pipeline.upload_store.local_path(filename)
+            except ValueError:
+                filepath = None   # key escapes the store
+            # The digest must belong to this file, or another upload's URL could be poisoned
+            if filepath is None or not os.path.exists(filepath) or file_digest(filepath) != digest:
+                return redirect(original)
+            if not pipeline.generate(filepath, digest, [size]):
+                return redirect(original)
+
+        response = send_from_directory(pipeline.thumb_folder, pipeline.thumb_name(digest, size),
+                                       max_age=THUMB_CACHE_SECONDS)
+        response.headers['Cache-Control'] = f'public, max-age={THUMB_CACHE_SECONDS}, immutable'
+        return response
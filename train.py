@@ -1,61 +1,404 @@
+import argparse
+import json
+import os
+import tempfile
 import tensorflow as tf
 import matplotlib.pyplot as plt
 
+from model_backend import class_names_path
+from train_config import MIXED_PRECISION_MODES, StepTimeCallback, configure_runtime
+
 dataset_path = "dataset"   # folder where all class folders exist
 
-# Load dataset and automatically split 80% train, 20% test
-train_data = tf.keras.preprocessing.image_dataset_from_directory(
-    dataset_path,
-    image_size=(128,128),
-    batch_size=32,
-    validation_split=0.2,
-    subset="training",
-    seed=42
-)
-
-valid_data = tf.keras.preprocessing.image_dataset_from_directory(
-    dataset_path,
-    image_size=(128,128),
-    batch_size=32,
-    validation_split=0.2,
-    subset="validation",
-    seed=42
-)
-
-class_names = train_data.class_names
-print("Number of classes:", len(class_names))
-print("Classes:", class_names)
-
-# Normalization
-AUTOTUNE = tf.data.AUTOTUNE
-
-train_data = train_data.map(lambda x, y: (tf.cast(x, tf.float32)/255.0, y)).prefetch(AUTOTUNE)
-valid_data = valid_data.map(lambda x, y: (tf.cast(x, tf.float32)/255.0, y)).prefetch(AUTOTUNE)
-
-# CNN Model
-model = tf.keras.Sequential([
-    tf.keras.layers.Conv2D(32, 3, activation="relu", input_shape=(128,128,3)),
-    tf.keras.layers.MaxPooling2D(),
-
-    tf.keras.layers.Conv2D(64, 3, activation="relu"),
-    tf.keras.layers.MaxPooling2D(),
-
-    tf.keras.layers.Conv2D(128, 3, activation="relu"),
-    tf.keras.layers.MaxPooling2D(),
-
-    tf.keras.layers.Flatten(),
-    tf.keras.layers.Dense(128, activation="relu"),
-    tf.keras.layers.Dropout(0.5),
-    tf.keras.layers.Dense(len(class_names), activation="softmax")
-])
-
-model.compile(
-    optimizer="adam",
-    loss="sparse_categorical_crossentropy",
-    metrics=["accuracy"]
-)
-
-model.fit(train_data, validation_data=valid_data, epochs=10)
-
-model.save("plant_model.h5")
-print("Model saved!")
+IMAGE_SIZE = (128, 128)
+BATCH_SIZE = 32
+VALIDATION_SPLIT = 0.2
+SEED = 42
+
+MODEL_PATH = "plant_model.h5"
+CLASSES_PATH = "plant_model.classes.json"
+
+
+def load_datasets(path=dataset_path, batch_size=BATCH_SIZE):
+    """Load dataset and automatically split 80% train, 20% test"""
+    train_data = tf.keras.preprocessing.image_dataset_from_directory(
+        path,
+        image_size=IMAGE_SIZE,
+        batch_size=batch_size,
+        validation_split=VALIDATION_SPLIT,
+        subset="training",
+        seed=SEED
+    )
+
+    valid_data = tf.keras.preprocessing.image_dataset_from_directory(
+        path,
+        image_size=IMAGE_SIZE,
+        batch_size=batch_size,
+        validation_split=VALIDATION_SPLIT,
+        subset="validation",
+        seed=SEED
+    )
+    return train_data, valid_data
+
+
+def shard_by_data(dataset):
+    """Each worker reads every file but keeps only its own slice of elements"""
+    options = tf.data.Options()
+    options.experimental_distribute.auto_shard_policy = tf.data.experimental.AutoShardPolicy.DATA
+    return dataset.with_options(options)
+
+
+def normalize(dataset):
+    """Scale pixels to [0, 1] the same way inference does"""
+    AUTOTUNE = tf.data.AUTOTUNE
+    return dataset.map(lambda x, y: (tf.cast(x, tf.float32)/255.0, y)).prefetch(AUTOTUNE)
+
+
+def build_flatten_model(num_classes):
+    """Original CNN: conv stack flattened into a dense layer"""
+    return tf.keras.Sequential([
+        tf.keras.layers.Conv2D(32, 3, activation="relu", input_shape=IMAGE_SIZE + (3,)),
+        tf.keras.layers.MaxPooling2D(),
+
+        tf.keras.layers.Conv2D(64, 3, activation="relu"),
+        tf.keras.layers.MaxPooling2D(),
+
+        tf.keras.layers.Conv2D(128, 3, activation="relu"),
+        tf.keras.layers.MaxPooling2D(),
+
+        tf.keras.layers.Flatten(),
+        tf.keras.layers.Dense(128, activation="relu"),
+        tf.keras.layers.Dropout(0.5),
+        tf.keras.layers.Dense(num_classes, activation="softmax", dtype="float32")
+    ])
+
+
+def build_gap_model(num_classes):
+    """Same conv stack, global average pooling instead of the 14x14x128 flatten"""
+    return tf.keras.Sequential([
+        tf.keras.layers.Conv2D(32, 3, activation="relu", input_shape=IMAGE_SIZE + (3,)),
+        tf.keras.layers.MaxPooling2D(),
+
+        tf.keras.layers.Conv2D(64, 3, activation="relu"),
+        tf.keras.layers.MaxPooling2D(),
+
+        tf.keras.layers.Conv2D(128, 3, activation="relu"),
+        tf.keras.layers.MaxPooling2D(),
+
+        tf.keras.layers.GlobalAveragePooling2D(),
+        tf.keras.layers.Dense(128, activation="relu"),
+        tf.keras.layers.Dropout(0.5),
+        tf.keras.layers.Dense(num_classes, activation="softmax", dtype="float32")
+    ])
+
+
+def separable_block(filters, strides):
+    """MobileNet-style depthwise 3x3 followed by pointwise 1x1"""
+    return [
+        tf.keras.layers.DepthwiseConv2D(3, strides=strides, padding="same", use_bias=False),
+        tf.keras.layers.BatchNormalization(),
+        tf.keras.layers.ReLU(),
+        tf.keras.layers.Conv2D(filters, 1, use_bias=False),
+        tf.keras.layers.BatchNormalization(),
+        tf.keras.layers.ReLU(),
+    ]
+
+
+def build_separable_model(num_classes):
+    """Depthwise-separable blocks with a global-pooling head"""
+    layers = [
+        tf.keras.layers.Conv2D(32, 3, strides=2, padding="same", use_bias=False,
+                               input_shape=IMAGE_SIZE + (3,)),
+        tf.keras.layers.BatchNormalization(),
+        tf.keras.layers.ReLU(),
+    ]
+    layers += separable_block(64, 1)
+    layers += separable_block(128, 2)
+    layers += separable_block(128, 1)
+    layers += separable_block(256, 2)
+    layers += separable_block(256, 1)
+    layers += [
+        tf.keras.layers.GlobalAveragePooling2D(),
+        tf.keras.layers.Dropout(0.3),
+        tf.keras.layers.Dense(num_classes, activation="softmax", dtype="float32")
+    ]
+    return tf.keras.Sequential(layers)
+
+
+ARCHITECTURES = {
+    "flatten": build_flatten_model,
+    "gap": build_gap_model,
+    "separable": build_separable_model,
+}
+
+
+def build_model(num_classes, arch="flatten"):
+    """CNN Model for the selected architecture preset"""
+    return ARCHITECTURES[arch](num_classes)
+
+
+def save_class_names(class_names, path=CLASSES_PATH):
+    """Store class order next to the model so inference backends can decode outputs"""
+    with open(path, "w") as f:
+        json.dump(class_names, f, indent=2)
+
+
+def load_cluster_spec(spec):
+    """
+    Parse a cluster spec given inline or as a JSON file path
+
+    Example: {"worker": ["localhost:12345", "localhost:12346"]}
+    """
+    if os.path.exists(spec):
+        with open(spec) as f:
+            return json.load(f)
+    return json.loads(spec)
+
+
+def setup_strategy(args):
+    """
+    Single-process default strategy, or MultiWorkerMirroredStrategy when a
+    cluster spec is given. Must be called before any other TensorFlow op.
+    """
+    if not args.cluster_spec:
+        return tf.distribute.get_strategy()
+
+    os.environ["TF_CONFIG"] = json.dumps({
+        "cluster": load_cluster_spec(args.cluster_spec),
+        "task": {"type": "worker", "index": args.worker_index}
+    })
+    return tf.distribute.MultiWorkerMirroredStrategy()
+
+
+def worker_path(path, worker_index):
+    """
+    Only the chief writes to the real path. Other workers still have to run
+    the save ops, so they write to a throwaway location.
+    """
+    if worker_index == 0:
+        return path
+    return os.path.join(tempfile.gettempdir(), f"worker_{worker_index}", os.path.basename(path))
+
+
+def best_weights_path(model_path):
+    """Best-so-far weights kept next to the model during training"""
+    return os.path.splitext(model_path)[0] + ".best.weights.h5"
+
+
+def selection_state_path(checkpoint_dir):
+    """Best val_loss and early-stopping counter of an interrupted run"""
+    return os.path.join(checkpoint_dir, "selection_state.json")
+
+
+class SelectionStateCallback(tf.keras.callbacks.Callback):
+    """
+    Carries ModelCheckpoint's best value and EarlyStopping's wait count across a resume
+
+    BackupAndRestore only restores the model, optimizer and epoch, so without
+    this the first epoch after a crash would overwrite a better pre-crash best
+    and patience would start over. Must come after both callbacks so it runs
+    after their on_train_begin/on_epoch_end. Only the chief writes the state.
+
+    best_metrics holds the validation metrics and epoch number of the saved
+    best weights, including epochs from before a resume, which are missing
+    from the History that model.fit returns.
+    """
+
+    def __init__(self, path, checkpoint, early_stopping, is_chief=True):
+        super().__init__()
+        self.path = path
+        self.checkpoint = checkpoint
+        self.early_stopping = early_stopping
+        self.is_chief = is_chief
+        self.best_metrics = {}
+
+    def on_train_begin(self, logs=None):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path) as f:
+            state = json.load(f)
+        self.checkpoint.best = state["best"]
+        self.early_stopping.best = state["best"]
+        self.early_stopping.wait = state["wait"]
+        self.best_metrics = state.get("best_metrics", {})
+        print(f"Resumed best val_loss {state['best']:.4f}, {state['wait']} epochs without improvement")
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self._best_before = self.checkpoint.best
+
+    def on_epoch_end(self, epoch, logs=None):
+        if self.checkpoint.best != self._best_before:
+            # ModelCheckpoint just saved this epoch's weights
+            self.best_metrics = {k: round(float(v), 4) for k, v in (logs or {}).items() if k.startswith("val_")}
+            self.best_metrics["epoch"] = epoch + 1
+        if not self.is_chief:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"best": float(self.checkpoint.best), "wait": int(self.early_stopping.wait),
+                       "best_metrics": self.best_metrics}, f)
+        os.replace(tmp, self.path)
+
+    def on_train_end(self, logs=None):
+        # Finished normally, like the BackupAndRestore backup
+        if self.is_chief and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def build_callbacks(args):
+    """
+    Checkpointing, automatic resume, early stopping and best-model selection
+
+    BackupAndRestore stores weights, optimizer state, epoch and the step within
+    the epoch, so a killed job restarted with the same command resumes where it
+    stopped instead of starting over. SelectionStateCallback restores the best
+    val_loss and patience counter alongside it. The backup is removed once
+    training finishes normally.
+    """
+    save_freq = args.checkpoint_every if args.checkpoint_every > 0 else "epoch"
+    checkpoint = tf.keras.callbacks.ModelCheckpoint(
+        best_weights_path(args.output),
+        monitor="val_loss",
+        save_best_only=True,
+        save_weights_only=True
+    )
+    early_stopping = tf.keras.callbacks.EarlyStopping(
+        monitor="val_loss",
+        patience=args.patience,
+        restore_best_weights=True
+    )
+    return [
+        tf.keras.callbacks.BackupAndRestore(args.checkpoint_dir, save_freq=save_freq),
+        checkpoint,
+        early_stopping,
+        SelectionStateCallback(selection_state_path(args.checkpoint_dir), checkpoint, early_stopping,
+                               is_chief=args.worker_index == 0),
+    ]
+
+
+def register_model(args, best_metrics):
+    """
+    Copy the saved model into the registry as a new version
+
+    Args:
+        best_metrics (dict): SelectionStateCallback.best_metrics, the validation
+            metrics of the saved weights (across resumes)
+    """
+    import model_registry
+
+    metadata = model_registry.register(
+        args.output, args.register,
+        metrics=best_metrics,
+        input_size=IMAGE_SIZE,
+        extra={'arch': args.arch, 'epochs': args.epochs, 'learning_rate': args.learning_rate},
+    )
+    if args.register_alias:
+        model_registry.set_alias(args.register, args.register_alias, metadata['version'])
+    print(f"Registered {args.register} {metadata['version']}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Train the flower disease CNN")
+    parser.add_argument("--dataset", default=dataset_path)
+    parser.add_argument("--arch", choices=sorted(ARCHITECTURES), default="flatten")
+    parser.add_argument("--epochs", type=int, default=10)
+    parser.add_argument("--learning-rate", type=float, default=0.001,
+                        help="single-worker rate, scaled linearly with worker count")
+    parser.add_argument("--output", default=MODEL_PATH)
+    parser.add_argument("--intra-op-threads", type=int, default=0, help="0 = TensorFlow default")
+    parser.add_argument("--inter-op-threads", type=int, default=0, help="0 = TensorFlow default")
+    parser.add_argument("--jit", action="store_true", help="compile the train step with XLA")
+    parser.add_argument("--mixed-precision", choices=MIXED_PRECISION_MODES, default="auto",
+                        help="auto = bfloat16 only on CPUs with native support")
+    parser.add_argument("--step-log", default="training_steps.jsonl")
+    parser.add_argument("--checkpoint-dir", default="checkpoints",
+                        help="backup location used to resume interrupted runs")
+    parser.add_argument("--checkpoint-every", type=int, default=0,
+                        help="checkpoint every N steps (0 = every epoch)")
+    parser.add_argument("--patience", type=int, default=3,
+                        help="epochs without val_loss improvement before stopping")
+    parser.add_argument("--cluster-spec", default=None,
+                        help='JSON or JSON file, e.g. {"worker": ["localhost:12345", "localhost:12346"]}')
+    parser.add_argument("--worker-index", type=int, default=0)
+    parser.add_argument("--register", default=None, metavar="NAME",
+                        help="also add the saved model to the model registry under NAME")
+    parser.add_argument("--register-alias", default=None,
+                        help="point this registry alias (e.g. candidate) at the new version")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # Must run before any TensorFlow op is created
+    runtime_config = configure_runtime(
+        args.intra_op_threads, args.inter_op_threads, args.jit, args.mixed_precision
+    )
+    strategy = setup_strategy(args)
+    num_workers = strategy.num_replicas_in_sync
+    global_batch_size = BATCH_SIZE * num_workers
+
+    runtime_config.update({
+        'arch': args.arch,
+        'workers': num_workers,
+        'worker_index': args.worker_index,
+        'global_batch_size': global_batch_size,
+    })
+    print("Runtime:", runtime_config)
+
+    # Keep the per-worker batch constant and scale the global batch with workers
+    train_data, valid_data = load_datasets(args.dataset, batch_size=global_batch_size)
+
+    class_names = train_data.class_names
+    print("Number of classes:", len(class_names))
+    print("Classes:", class_names)
+    print("Architecture:", args.arch)
+
+    # Normalization
+    train_data = shard_by_data(normalize(train_data))
+    valid_data = shard_by_data(normalize(valid_data))
+
+    with strategy.scope():
+        model = build_model(len(class_names), args.arch)
+
+        model.compile(
+            optimizer=tf.keras.optimizers.Adam(learning_rate=args.learning_rate * num_workers),
+            loss="sparse_categorical_crossentropy",
+            metrics=["accuracy"],
+            jit_compile=args.jit
+        )
+
+    args.output = worker_path(args.output, args.worker_index)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+
+    # Selection state is written after every epoch, so without it no epoch of this run has
+    # finished and any best-weights file is left over from an earlier, unrelated run
+    resuming = os.path.exists(selection_state_path(args.checkpoint_dir))
+    if not resuming and os.path.exists(best_weights_path(args.output)):
+        os.remove(best_weights_path(args.output))
+
+    step_timer = StepTimeCallback(runtime_config, args.step_log)
+    callbacks = build_callbacks(args)
+    selection = callbacks[-1]   # SelectionStateCallback, always last
+    model.fit(
+        train_data,
+        validation_data=valid_data,
+        epochs=args.epochs,
+        callbacks=[step_timer] + callbacks
+    )
+
+    # Keep the epoch with the lowest validation loss, not the last one
+    if os.path.exists(best_weights_path(args.output)):
+        model.load_weights(best_weights_path(args.output))
+
+    model.save(args.output)
+    if args.worker_index == 0:
+        save_class_names(class_names, class_names_path(args.output))
+        print("Model saved!")
+        if args.register:
+            register_model(args, selection.best_metrics)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Training Configuration Module - Flower Disease Advisor
+CPU threading, XLA and bfloat16 mixed precision settings for train.py
+"""
+
+import json
+import os
+import time
+
+import numpy as np
+import tensorflow as tf
+
+
+MIXED_PRECISION_MODES = ("auto", "bfloat16", "off")
+
+# CPU flags that mean bfloat16 math runs natively instead of being emulated
+BF16_CPU_FLAGS = ("avx512_bf16", "amx_bf16")
+
+
+# ==================== CPU DETECTION ====================
+
+def cpu_supports_bfloat16():
+    """
+    Check /proc/cpuinfo for native bfloat16 instructions
+
+    Returns:
+        bool: True on CPUs with AVX512-BF16 or AMX
+    """
+    try:
+        with open("/proc/cpuinfo") as f:
+            flags = f.read()
+    except OSError:
+        return False
+    return any(flag in flags for flag in BF16_CPU_FLAGS)
+
+
+# ==================== RUNTIME SETUP ====================
+
+def configure_runtime(intra_op_threads=0, inter_op_threads=0, jit=False, mixed_precision="auto"):
+    """
+    Apply thread pools, XLA and precision policy before any TensorFlow op runs
+
+    Args:
+        intra_op_threads (int): Threads inside one op (0 = TensorFlow default)
+        inter_op_threads (int): Ops run concurrently (0 = TensorFlow default)
+        jit (bool): Enable XLA auto-clustering
+        mixed_precision (str): 'auto', 'bfloat16' or 'off'
+
+    Returns:
+        dict: The effective configuration, recorded alongside step times
+    """
+    if intra_op_threads:
+        tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads)
+    if inter_op_threads:
+        tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
+
+    tf.config.optimizer.set_jit("autoclustering" if jit else False)
+
+    use_bf16 = mixed_precision == "bfloat16" or (
+        mixed_precision == "auto" and cpu_supports_bfloat16()
+    )
+    policy = "mixed_bfloat16" if use_bf16 else "float32"
+    tf.keras.mixed_precision.set_global_policy(policy)
+
+    return {
+        'intra_op_threads': tf.config.threading.get_intra_op_parallelism_threads(),
+        'inter_op_threads': tf.config.threading.get_inter_op_parallelism_threads(),
+        'cpu_count': os.cpu_count(),
+        'jit': jit,
+        'precision_policy': policy,
+    }
+
+
+# ==================== STEP TIMING ====================
+
+class StepTimeCallback(tf.keras.callbacks.Callback):
+    """Records per-step wall time and appends a summary line per run"""
+
+    def __init__(self, config, log_path="training_steps.jsonl", skip_steps=5):
+        super().__init__()
+        self.config = config
+        self.log_path = log_path
+        self.skip_steps = skip_steps  # first steps include tracing/compilation
+        self.step_times = []
+        self._start = None
+        self._steps_seen = 0
+
+    def on_train_batch_begin(self, batch, logs=None):
+        self._start = time.perf_counter()
+
+    def on_train_batch_end(self, batch, logs=None):
+        self._steps_seen += 1
+        if self._steps_seen > self.skip_steps:
+            self.step_times.append(time.perf_counter() - self._start)
+
+    def summary(self):
+        """Step time percentiles in milliseconds"""
+        if not self.step_times:
+            return {'steps': 0}
+        times = np.asarray(self.step_times) * 1000
+        return {
+            'steps': len(times),
+            'step_p50_ms': round(float(np.percentile(times, 50)), 2),
+            'step_p95_ms': round(float(np.percentile(times, 95)), 2),
+            'step_mean_ms': round(float(times.mean()), 2),
+        }
+
+    def on_train_end(self, logs=None):
+        record = dict(self.config, **self.summary())
+        with open(self.log_path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+        print("⏱️ Step time:", record)
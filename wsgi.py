@@ -0,0 +1,11 @@
+"""
+WSGI Entry Point - Flower Disease Advisor
+Production servers import the Flask application from here
+
+Usage:
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+from app import app
+
+application = app